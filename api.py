@@ -0,0 +1,45 @@
+import hashlib
+import json
+from datetime import date, datetime
+from flask import Response, request
+
+API_PREFIX = '/api/v1'
+API_MIMETYPE = 'application/json'
+# Part of every ETag: bump it when a representation changes shape so
+# clients holding old ETags refetch.
+REPRESENTATION = 2
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def dumps(payload):
+    return json.dumps(payload, separators=(',', ':'), default=_default)
+
+
+def version_etag(version):
+    """Strong ETag for a tuple of row versions (updated_at maxima, counts)."""
+    return hashlib.sha1(dumps([REPRESENTATION] + list(version)).encode('utf-8')).hexdigest()
+
+
+def conditional_json(version, build):
+    """304 Not Modified when the request's If-None-Match already holds the
+    ETag of version; otherwise build() serialized under that ETag. Compute
+    version before build() so a write in between can only make the body
+    newer than its ETag, never older."""
+    etag = version_etag(version)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(dumps(build()), mimetype=API_MIMETYPE)
+    response.set_etag(etag)
+    # clients may keep the body but must revalidate before using it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def api_error(status, message):
+    return Response(dumps({'error': message}), status=status, mimetype=API_MIMETYPE)
@@ -0,0 +1,254 @@
+import heapq
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from datetime import timedelta
+from sqlalchemy import func
+
+# Sorts after every character, so key + LAST_CHAR bounds the keys starting
+# with key.
+LAST_CHAR = chr(sys.maxunicode)
+
+
+def normalize(name):
+    return ' '.join((name or '').casefold().split())
+
+
+class PackedStrings(object):
+    """Read-only sequence of strings kept as one str and an offsets array,
+    instead of a million str objects."""
+
+    def __init__(self, strings):
+        offsets = array('I', [0])
+        parts = []
+        for string in strings:
+            parts.append(string)
+            offsets.append(offsets[-1] + len(string))
+        self._data = ''.join(parts)
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self._data[self._offsets[index]:self._offsets[index + 1]]
+
+    def nbytes(self):
+        return sys.getsizeof(self._data) + self._offsets.itemsize * len(self._offsets)
+
+
+class PrefixIndex(object):
+    """Prefix index of names ranked by a count, in the space of a flat
+    sorted array rather than a trie of dicts.
+
+    The names are sorted by their normalized form, so the names starting
+    with a prefix are a contiguous range found by bisection, the range a
+    trie node would cover. A segment tree over the ranks returns the
+    range's top k in O(k log n). Ranks are updated in place. A renamed or
+    added entry goes to a small overlay, and its old position is masked
+    with rank -1, until the next build."""
+
+    def __init__(self, rows=()):
+        entries = sorted((normalize(name), name, entry_id, rank) for entry_id, name, rank in rows if name)
+        self._keys = PackedStrings(entry[0] for entry in entries)
+        self._names = PackedStrings(entry[1] for entry in entries)
+        self._ids = array('i', (entry[2] for entry in entries))
+        self._ranks = array('i', (entry[3] or 0 for entry in entries))
+        del entries
+        # positions ordered by id, to find an entry's position by bisection
+        order = sorted(range(len(self._ids)), key=self._ids.__getitem__)
+        self._sorted_ids = array('i', (self._ids[position] for position in order))
+        self._id_positions = array('i', order)
+        del order
+        self._size = 1
+        while self._size < max(len(self._ids), 1):
+            self._size *= 2
+        # tree[node] is the position with the highest rank below node, -1 if none
+        tree = array('i', [-1]) * (2 * self._size)
+        tree[self._size:self._size + len(self._ids)] = array('i', range(len(self._ids)))
+        for node in range(self._size - 1, 0, -1):
+            tree[node] = self._better(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+        # id -> (key, name, rank), and (key, id) in order for prefix ranges
+        self._overlay = {}
+        self._overlay_keys = []
+
+    def __len__(self):
+        return len(self._ids) + len(self._overlay)
+
+    def _better(self, a, b):
+        # higher rank wins, then the earlier (alphabetically smaller) name
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        rank_a = self._ranks[a]
+        rank_b = self._ranks[b]
+        if rank_a == rank_b:
+            return min(a, b)
+        return a if rank_a > rank_b else b
+
+    def _best(self, lo, hi):
+        best = -1
+        lo += self._size
+        hi += self._size
+        while lo < hi:
+            if lo & 1:
+                best = self._better(best, self._tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = self._better(self._tree[hi], best)
+            lo //= 2
+            hi //= 2
+        return best
+
+    def _set_rank(self, position, rank):
+        self._ranks[position] = rank
+        node = (position + self._size) // 2
+        while node:
+            self._tree[node] = self._better(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    def _position(self, entry_id):
+        index = bisect_left(self._sorted_ids, entry_id)
+        if index < len(self._sorted_ids) and self._sorted_ids[index] == entry_id:
+            return self._id_positions[index]
+        return None
+
+    def update(self, entry_id, name, rank=None):
+        """Add or rename an entry, or change its rank; rank None keeps the
+        current one."""
+        position = self._position(entry_id)
+        current = self._overlay.get(entry_id)
+        if rank is None:
+            if current is not None:
+                rank = current[2]
+            elif position is not None:
+                rank = max(self._ranks[position], 0)
+            else:
+                rank = 0
+        if position is not None and current is None and self._names[position] == name:
+            self._set_rank(position, rank)
+            return
+        if position is not None and self._ranks[position] >= 0:
+            self._set_rank(position, -1)
+        if current is not None:
+            del self._overlay_keys[bisect_left(self._overlay_keys, (current[0], entry_id))]
+        key = normalize(name)
+        self._overlay[entry_id] = (key, name, rank)
+        insort(self._overlay_keys, (key, entry_id))
+
+    def search(self, prefix, limit=10):
+        """Up to limit (id, name, rank) whose name starts with prefix,
+        highest rank first."""
+        key = normalize(prefix)
+        if not key or limit < 1:
+            return []
+        lo = bisect_left(self._keys, key)
+        hi = bisect_left(self._keys, key + LAST_CHAR, lo)
+        results = []
+        heap = []
+        best = self._best(lo, hi)
+        if best >= 0:
+            heap.append((-self._ranks[best], best, lo, hi))
+        while heap and len(results) < limit:
+            negative_rank, position, start, end = heapq.heappop(heap)
+            if negative_rank > 0:
+                # only masked entries are left
+                break
+            results.append((negative_rank, self._keys[position], self._ids[position], self._names[position]))
+            for start, end in ((start, position), (position + 1, end)):
+                if start < end:
+                    best = self._best(start, end)
+                    heapq.heappush(heap, (-self._ranks[best], best, start, end))
+        if self._overlay_keys:
+            start = bisect_left(self._overlay_keys, (key,))
+            end = bisect_left(self._overlay_keys, (key + LAST_CHAR,), start)
+            for entry_key, entry_id in self._overlay_keys[start:end]:
+                name, rank = self._overlay[entry_id][1:]
+                results.append((-rank, entry_key, entry_id, name))
+            results.sort()
+        return [(entry_id, name, -negative_rank) for negative_rank, entry_key, entry_id, name in results[:limit]]
+
+    def overlay_size(self):
+        return len(self._overlay)
+
+    def nbytes(self):
+        arrays = (self._ids, self._ranks, self._sorted_ids, self._id_positions, self._tree)
+        return (self._keys.nbytes() + self._names.nbytes() + sys.getsizeof(self._overlay)
+                + sum(array.itemsize * len(array) for array in arrays)
+                + sum(sys.getsizeof(entry[1]) * 2 for entry in self._overlay.values()))
+
+
+class Autocomplete(object):
+    """A PrefixIndex of names per model, ranked by upcoming_shows_count.
+    load() builds them with one query per model. Before a search,
+    refresh() applies the rows whose updated_at moved, at most every
+    poll_seconds, so writes made by other workers show up too. A worker
+    applies its own creates and edits through update() straight away."""
+
+    def __init__(self, models, poll_seconds=1.0, overlay_limit=5000):
+        self.models = models
+        self.poll_seconds = poll_seconds
+        self.overlay_limit = overlay_limit
+        self.indexes = {}
+        self._watermarks = {}
+        self._polled = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, session, batch_size=10000):
+        with self._lock:
+            for kind, model in self.models.items():
+                # read first, so rows changed during the load are polled again
+                watermark = session.query(func.max(model.updated_at)).scalar()
+                rows = session.query(model.id, model.name, model.upcoming_shows_count) \
+                    .execution_options(stream_results=True).yield_per(batch_size)
+                self.indexes[kind] = PrefixIndex(rows)
+                self._watermarks[kind] = watermark
+            self._polled = time.monotonic()
+
+    def refresh(self, session, overlap=timedelta(seconds=5)):
+        if not self.indexes:
+            self.load(session)
+            return
+        if time.monotonic() - self._polled < self.poll_seconds:
+            return
+        with self._lock:
+            self._polled = time.monotonic()
+            for kind, model in self.models.items():
+                watermark = self._watermarks[kind]
+                query = session.query(model.id, model.name, model.upcoming_shows_count, model.updated_at)
+                if watermark is not None:
+                    # updated_at is set before commit, so a transaction can
+                    # commit a little behind the watermark
+                    query = query.filter(model.updated_at > watermark - overlap)
+                rows = query.limit(self.overlay_limit + 1).all()
+                if len(rows) > self.overlay_limit or \
+                        self.indexes[kind].overlay_size() + len(rows) > self.overlay_limit:
+                    # a bulk load: rebuilding is cheaper than a big overlay
+                    break
+                index = self.indexes[kind]
+                for entry_id, name, rank, updated_at in rows:
+                    if name:
+                        index.update(entry_id, name, rank)
+                    if watermark is None or updated_at > watermark:
+                        watermark = updated_at
+                self._watermarks[kind] = watermark
+            else:
+                return
+        self.load(session)
+
+    def update(self, kind, entry_id, name, rank=None):
+        if kind in self.indexes and name:
+            with self._lock:
+                self.indexes[kind].update(entry_id, name, rank)
+
+    def search(self, kind, prefix, limit=10):
+        return self.indexes[kind].search(prefix, limit)
+
+    def stats(self):
+        return {kind: {'names': len(index), 'overlay': index.overlay_size(), 'bytes': index.nbytes()}
+                for kind, index in self.indexes.items()}
@@ -0,0 +1,317 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from explain import capture_queries
+
+# (name, method, url, form data) - every route of the blueprints. Write routes run
+# last so the read numbers are taken against the freshly seeded data.
+ROUTES = [
+    ('index', 'GET', '/', None),
+    ('venues', 'GET', '/venues', None),
+    ('show_venue', 'GET', '/venues/{venue_id}', None),
+    ('search_venues', 'POST', '/venues/search', {'search_term': 'the'}),
+    ('nearby_venues', 'GET', '/venues/nearby?lat=37.7749&lon=-122.4194&radius=20', None),
+    ('create_venue_form', 'GET', '/venues/create', None),
+    ('edit_venue', 'GET', '/venues/{venue_id}/edit', None),
+    ('artists', 'GET', '/artists', None),
+    ('show_artist', 'GET', '/artists/{artist_id}', None),
+    ('search_artists', 'POST', '/artists/search', {'search_term': 'the'}),
+    ('create_artist_form', 'GET', '/artists/create', None),
+    ('edit_artist', 'GET', '/artists/{artist_id}/edit', None),
+    ('genres', 'GET', '/genres', None),
+    ('show_genre', 'GET', '/genres/Jazz', None),
+    ('artists_by_genre', 'GET', '/artists?genre=Jazz', None),
+    ('shows', 'GET', '/shows', None),
+    ('shows_filtered', 'GET', '/shows?from={today}&to={next_month}', None),
+    ('create_shows', 'GET', '/shows/create', None),
+    ('api_venues', 'GET', '/api/v1/venues', None),
+    ('api_venue', 'GET', '/api/v1/venues/{venue_id}', None),
+    ('api_venue_past_shows', 'GET', '/api/v1/venues/{venue_id}/past_shows', None),
+    ('api_search_venues', 'GET', '/api/v1/venues/search?q=the', None),
+    ('api_artists', 'GET', '/api/v1/artists', None),
+    ('api_artist', 'GET', '/api/v1/artists/{artist_id}', None),
+    ('api_artist_past_shows', 'GET', '/api/v1/artists/{artist_id}/past_shows', None),
+    ('api_search_artists', 'GET', '/api/v1/artists/search?q=the', None),
+    ('api_shows', 'GET', '/api/v1/shows', None),
+    ('create_venue_submission', 'POST', '/venues/create', 'submission'),
+    ('edit_venue_submission', 'POST', '/venues/{venue_id}/edit', 'submission'),
+    ('create_artist_submission', 'POST', '/artists/create', 'submission'),
+    ('edit_artist_submission', 'POST', '/artists/{artist_id}/edit', 'submission'),
+    ('create_show_submission', 'POST', '/shows/create', 'submission'),
+]
+
+# Read routes driven by the concurrency benchmark: the busiest detail
+# pages, which are the slow ones, and the paged lists.
+CONCURRENCY_PATHS = ['/venues/{venue_id}', '/artists/{artist_id}', '/shows', '/genres',
+                     '/api/v1/venues/{venue_id}', '/api/v1/shows']
+
+# Modules the web workers must not import at boot: CLI and migration
+# tooling, and libraries only some requests need, which import lazily.
+# babel is not one of them: the views import forms, and flask_wtf.i18n
+# imports babel with it.
+LAZY_MODULES = ('flask_script', 'flask_migrate', 'alembic', 'dateutil', 'psycopg2')
+
+# One form body carrying every field any of the submission handlers reads.
+SUBMISSION = {
+    'name': 'Benchmark', 'city': 'San Francisco', 'state': 'CA', 'address': '1015 Folsom Street',
+    'phone': '123-123-1234', 'genres': 'Jazz', 'website': 'https://example.com',
+    'image_link': 'https://example.com/image.jpg', 'facebook_link': 'https://www.facebook.com/example',
+    'seeking_talent': 'n', 'seeking_venue': 'n', 'seeking_description': '',
+}
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(client, engine, method, url, data, iterations):
+    timings = []
+    with capture_queries(engine, selects_only=False) as queries:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            # buffered so streamed pages are timed (and queried) to the last byte
+            client.open(url, method=method, data=data, buffered=True)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'statements': len(queries) // iterations,
+    }
+
+
+def run_routes(client, engine, ids, iterations):
+    now = datetime.now()
+    values = dict(ids, today=now.strftime('%Y-%m-%d'),
+                  next_month=(now + timedelta(days=30)).strftime('%Y-%m-%d'))
+    submission = dict(SUBMISSION, venue_id=ids['venue_id'], artist_id=ids['artist_id'],
+                      start_time=(now + timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'))
+    results = {}
+    for name, method, url, data in ROUTES:
+        if data == 'submission':
+            data = submission
+        results[name] = measure(client, engine, method, url.format(**values), data, iterations)
+    return results
+
+
+def compare(results, baseline, tolerance=0.25, floor_ms=2.0):
+    """Return a line per regression: more SQL statements than the baseline,
+    or a p95 more than tolerance (and floor_ms) slower."""
+    regressions = []
+    for scale, routes in results.items():
+        for name, current in routes.items():
+            previous = baseline.get(scale, {}).get(name)
+            if previous is None:
+                continue
+            if current['statements'] > previous['statements']:
+                regressions.append('{} @ {}: {} statements (baseline {})'.format(
+                    name, scale, current['statements'], previous['statements']))
+            limit = max(previous['p95_ms'] * (1 + tolerance), previous['p95_ms'] + floor_ms)
+            if current['p95_ms'] > limit:
+                regressions.append('{} @ {}: p95 {}ms (baseline {}ms)'.format(
+                    name, scale, current['p95_ms'], previous['p95_ms']))
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def measure_stream(client, url):
+    """Consume a streamed response chunk by chunk and report its size,
+    duration and the peak Python memory allocated while producing it."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url)
+    size = lines = 0
+    try:
+        for chunk in response.response:
+            size += len(chunk)
+            lines += chunk.count(b'\n') if isinstance(chunk, bytes) else chunk.count('\n')
+    finally:
+        response.close()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'bytes': size, 'lines': lines, 'seconds': round(elapsed, 3), 'peak_kb': peak // 1024}
+
+
+def time_calls(function, calls):
+    """p50/p95/p99 in milliseconds of function(*args) over every args in calls."""
+    timings = []
+    for args in calls:
+        start = time.perf_counter()
+        function(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {'p50_ms': round(percentile(timings, 0.50), 3), 'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3)}
+
+
+def per_call_us(function, values, *args):
+    """Mean microseconds of function(value, *args) over values."""
+    start = time.perf_counter()
+    for value in values:
+        function(value, *args)
+    return (time.perf_counter() - start) / len(values) * 1e6
+
+
+def parse_importtime(output):
+    """(module, self_us, cumulative_us, depth) for each line python
+    -X importtime wrote to stderr, in its order: a module comes after
+    everything it imported, one depth level deeper."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # one space after the bar, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_subtree(rows, module):
+    """The rows imported by the top level import of module, itself last;
+    interpreter startup and anything else is left out."""
+    pending = []
+    for row in rows:
+        pending.append(row)
+        if row[3] == 0:
+            if row[0] == module:
+                return pending
+            pending = []
+    raise ValueError('{} was not imported'.format(module))
+
+
+def import_report(module, runs=7):
+    """Import module in runs fresh interpreters under -X importtime and
+    report the median run: total milliseconds, milliseconds per top level
+    package and per module (self time), and the LAZY_MODULES it pulled in."""
+    samples = []
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if process.returncode:
+            raise RuntimeError(process.stderr.strip().splitlines()[-1])
+        rows = import_subtree(parse_importtime(process.stderr), module)
+        samples.append((rows[-1][2], rows))
+    samples.sort(key=lambda sample: sample[0])
+    total_us, rows = samples[len(samples) // 2]
+    packages = {}
+    for name, self_us, cumulative_us, depth in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return {
+        'module': module,
+        'total_ms': round(total_us / 1000, 1),
+        'packages': {package: round(us / 1000, 1) for package, us in packages.items()},
+        'modules': {name: round(self_us / 1000, 1) for name, self_us, cumulative_us, depth in rows},
+        'lazy_imported': sorted(package for package in packages if package in LAZY_MODULES),
+    }
+
+
+def compare_imports(report, baseline, tolerance=0.25, floor_ms=5.0):
+    """Return a line per regression: a LAZY_MODULES import, or the total or
+    a package more than tolerance (and floor_ms) slower than the baseline.
+    Packages the baseline does not list are not compared."""
+    regressions = ['{} imports {}'.format(report['module'], package) for package in report['lazy_imported']]
+    pairs = [('total', report['total_ms'], baseline.get('total_ms'))]
+    pairs += [(package, ms, baseline.get('packages', {}).get(package))
+              for package, ms in sorted(report['packages'].items())]
+    for name, current, previous in pairs:
+        if previous is None:
+            continue
+        if current > max(previous * (1 + tolerance), previous + floor_ms):
+            regressions.append('{}: {}ms (baseline {}ms)'.format(name, current, previous))
+    return regressions
+
+
+@contextmanager
+def gunicorn_server(port, worker_class='sync', workers=4, env=None, timeout=30):
+    """Run wsgi:app under gunicorn with gunicorn.conf.py on 127.0.0.1:port
+    until the block exits."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+               '--bind', '127.0.0.1:{}'.format(port), '--workers', str(workers), 'wsgi:app']
+    process = subprocess.Popen(command, cwd=root,
+                               env=dict(os.environ, GUNICORN_WORKER_CLASS=worker_class, **(env or {})))
+    try:
+        deadline = time.perf_counter() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn exited with {}'.format(process.returncode))
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError('gunicorn did not listen on port {}'.format(port))
+                time.sleep(0.2)
+        yield process
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def load_test(host, port, paths, clients, seconds):
+    """Drive clients concurrent HTTP/1.0 clients for seconds, each one
+    requesting paths in turn; report requests per second, p50/p95/p99
+    latency of the successful requests and the number of errors (status
+    400 and up, refused or dropped connections)."""
+    return asyncio.run(_load_test(host, port, paths, clients, seconds))
+
+
+async def _load_test(host, port, paths, clients, seconds):
+    timings = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(offset):
+        nonlocal errors
+        index = offset
+        while time.perf_counter() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            start = time.perf_counter()
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write('GET {} HTTP/1.0\r\nHost: {}\r\n\r\n'.format(path, host).encode('ascii'))
+                status_line = await reader.readline()
+                # HTTP/1.0: the server closes the connection after the body
+                await reader.read()
+                writer.close()
+                status = int(status_line.split()[1])
+            except (OSError, IndexError, ValueError):
+                errors += 1
+                await asyncio.sleep(0.01)
+                continue
+            if status >= 400:
+                errors += 1
+            else:
+                timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(clients)))
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    result = {'requests': len(timings), 'rps': round(len(timings) / elapsed, 1), 'errors': errors}
+    for name, fraction in (('p50_ms', 0.50), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+        result[name] = round(percentile(timings, fraction), 1) if timings else None
+    return result
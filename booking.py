@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+
+def sweep_overlaps(rows):
+    """Yield (key, show_id, other_show_id) for every pair of overlapping
+    shows. rows are (key, show_id, start_time, duration_minutes) sorted by
+    (key, start_time); one pass keeps only the shows still running at the
+    current start time, so the cost is the sort plus the overlaps found."""
+    current_key = None
+    active = []
+    for key, show_id, start_time, duration in rows:
+        if key != current_key:
+            current_key = key
+            active = []
+        end_time = start_time + timedelta(minutes=duration)
+        active = [(other_id, other_end) for other_id, other_end in active if other_end > start_time]
+        for other_id, other_end in active:
+            yield key, other_id, show_id
+        active.append((show_id, end_time))
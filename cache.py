@@ -0,0 +1,115 @@
+import pickle
+import threading
+import time
+from cachetools import TTLCache
+
+
+class LocalCache(object):
+    """In-process LRU cache whose entries also expire after ttl seconds.
+    Each gunicorn worker holds its own copy."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.monotonic():
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        # a per-entry ttl can only shorten the cache wide one
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+
+
+class RedisCache(object):
+    """Cache shared by every worker. Needs the optional redis package."""
+
+    def __init__(self, url, ttl=300, prefix='jamspot:'):
+        import redis
+        self._client = redis.StrictRedis.from_url(url)
+        self._ttl = ttl
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self._prefix + key, pickle.dumps(value), ex=ttl or self._ttl)
+
+
+class NullCache(object):
+    """Caching disabled: every lookup is a miss."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+
+class PageCache(object):
+    """Read-through cache for page data. Keys carry the page's
+    Last-Modified (views.helpers.page_key), so a change moves readers to a
+    new key and nothing is invalidated explicitly; old entries age out by
+    LRU and ttl. Counts hits and misses so the backend can be sized."""
+
+    def __init__(self, backend=None):
+        self.backend = backend or NullCache()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, build, ttl=None):
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(hit=True)
+            return value
+        self._count(hit=False)
+        value = build()
+        self.backend.set(key, value, ttl)
+        return value
+
+    def init_app(self, app, prefix='CACHE'):
+        """Use the backend configured by app's <prefix>_* settings."""
+        self.backend = make_cache(app.config, prefix).backend
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": float(hits) / lookups if lookups else 0.0,
+        }
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+def make_cache(config, prefix='CACHE'):
+    """Build a PageCache from the <prefix>_BACKEND, _MAXSIZE, _TTL and
+    _REDIS_URL settings."""
+    backend = config.get(prefix + '_BACKEND', 'local')
+    if backend == 'local':
+        return PageCache(LocalCache(maxsize=config[prefix + '_MAXSIZE'], ttl=config[prefix + '_TTL']))
+    if backend == 'redis':
+        url = config.get(prefix + '_REDIS_URL') or config['CACHE_REDIS_URL']
+        return PageCache(RedisCache(url, ttl=config[prefix + '_TTL']))
+    if backend == 'null':
+        return PageCache(NullCache())
+    raise ValueError('Unknown {}_BACKEND: {}'.format(prefix, backend))
@@ -0,0 +1,488 @@
+import sys
+import time
+from datetime import datetime
+from flask import render_template
+from sqlalchemy import func, case
+from flask_script import Manager
+from flask_migrate import Migrate, MigrateCommand
+from app import create_app
+from extensions import db, page_cache
+from models import Venue, Artist, Show, ShowArchive, Genre, VenueArea, artist_genres, link_artist_genres, \
+  mark_venue_areas_stale, stale_venue_areas, refresh_venue_area, rebuild_venue_areas
+from cache import NullCache
+from explain import capture_queries, sequential_scans
+from seed import Generator, seed_database, reset_database, reset_sequences, VENUE_WORDS, ARTIST_WORDS
+from importer import BulkLoader
+from bench import run_routes, compare, load_baseline, save_baseline, measure_stream, time_calls, per_call_us, \
+  import_report, compare_imports, gunicorn_server, load_test, CONCURRENCY_PATHS
+from geo import OfflineGeocoder, CITY_COORDINATES, geo_cell, nearby, nearby_naive
+from booking import sweep_overlaps
+from partitions import maintain_show_partitions
+from formatting import DatetimeFormatter, format_datetime_uncached
+from autocomplete import PrefixIndex
+
+# The CLI builds its own app; workers import wsgi.py and never load
+# flask_script, flask_migrate or anything below.
+app = create_app()
+migrate = Migrate(app, db)
+manager = Manager(app)
+manager.add_command('db', MigrateCommand)
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+
+def reconcile_table(model, show_fk, archive_fk, now, batch_size):
+  checked = corrected = 0
+  last_id = 0
+  # every archived show is a past one
+  archived = db.session.query(func.count(ShowArchive.id)).filter(archive_fk == model.id) \
+    .correlate(model).as_scalar()
+  while True:
+    # keyset batches over the primary key, recounting each batch in one query
+    rows = db.session.query(model.id, model.upcoming_shows_count, model.past_shows_count,
+      func.count(case([(Show.start_time > now, Show.id)])),
+      func.count(case([(Show.start_time <= now, Show.id)])), archived) \
+      .outerjoin(Show, show_fk == model.id) \
+      .filter(model.id > last_id) \
+      .group_by(model.id) \
+      .order_by(model.id).limit(batch_size).all()
+    if not rows:
+      break
+    changed = []
+    for entity_id, stored_upcoming, stored_past, upcoming, hot_past, archived_past in rows:
+      past = hot_past + archived_past
+      if (stored_upcoming, stored_past) != (upcoming, past):
+        print('{} {}: upcoming {} -> {}, past {} -> {}'.format(model.__tablename__, entity_id,
+          stored_upcoming, upcoming, stored_past, past))
+        db.session.query(model).filter(model.id == entity_id) \
+          .update({'upcoming_shows_count': upcoming, 'past_shows_count': past}, synchronize_session=False)
+        changed.append(entity_id)
+    if model is Venue and changed:
+      # /venues lists the upcoming counts
+      mark_venue_areas_stale(changed)
+    db.session.commit()
+    corrected += len(changed)
+    checked += len(rows)
+    last_id = rows[-1][0]
+  return checked, corrected
+
+def reconcile_genres():
+  # there are only a few dozen genres, so one grouped query covers them all
+  rows = db.session.query(Genre.id, Genre.name, Genre.artist_count, func.count(artist_genres.c.artist_id)) \
+    .outerjoin(artist_genres, artist_genres.c.genre_id == Genre.id) \
+    .group_by(Genre.id).all()
+  corrected = 0
+  for genre_id, name, stored, count in rows:
+    if stored != count:
+      print('Genre {}: artist_count {} -> {}'.format(name, stored, count))
+      db.session.query(Genre).filter(Genre.id == genre_id) \
+        .update({'artist_count': count}, synchronize_session=False)
+      corrected += 1
+  db.session.commit()
+  return len(rows), corrected
+
+@manager.option('-b', '--batch-size', dest='batch_size', type=int, default=1000)
+def reconcile_counts(batch_size=1000):
+  """Roll shows from upcoming to past and repair drifted show counters."""
+  now = datetime.now()
+  for model, show_fk, archive_fk in ((Venue, Show.venue_id, ShowArchive.venue_id),
+    (Artist, Show.artist_id, ShowArchive.artist_id)):
+    checked, corrected = reconcile_table(model, show_fk, archive_fk, now, batch_size)
+    print('{}: checked {}, corrected {}'.format(model.__tablename__, checked, corrected))
+  # the corrected rows' updated_at moves with the counts, so the pages
+  # that list them revalidate in every worker
+  checked, corrected = reconcile_genres()
+  print('Genre: checked {}, corrected {}'.format(checked, corrected))
+
+@manager.option('-a', '--all', dest='rebuild', action='store_true', default=False)
+def refresh_venue_areas(rebuild=False):
+  """Refresh the stale /venues area summaries now rather than on the next
+  request past VENUE_AREAS_MAX_STALENESS; --all rebuilds every area."""
+  if rebuild:
+    refreshed = rebuild_venue_areas()
+  else:
+    refreshed = sum(refresh_venue_area(area_id) for area_id in stale_venue_areas(0))
+  print('refreshed {} of {} venue areas'.format(refreshed, db.session.query(VenueArea).count()))
+
+#----------------------------------------------------------------------------#
+# Show partitions.
+#----------------------------------------------------------------------------#
+
+@manager.option('-d', '--detach', dest='detach', action='store_true', default=False)
+@manager.option('-b', '--batch-size', dest='batch_size', type=int, default=5000)
+def partition_shows(detach=False, batch_size=5000):
+  """Create the monthly Show partitions SHOW_PARTITION_MONTHS_AHEAD ahead
+  and move months older than SHOW_HOT_MONTHS to ShowArchive; --detach
+  leaves them as standalone tables to dump and drop instead. Run daily."""
+  # each move writes a ShowArchiveRun, which moves the version of /shows
+  maintain_show_partitions(db.session, datetime.now(), app.config['SHOW_HOT_MONTHS'],
+    app.config['SHOW_PARTITION_MONTHS_AHEAD'], detach=detach, batch_size=batch_size)
+
+#----------------------------------------------------------------------------#
+# Query plans.
+#----------------------------------------------------------------------------#
+
+# (method, url, form data, tables the page is allowed to read in full)
+HOT_ROUTES = [
+  ('GET', '/venues', None, {'VenueArea'}),
+  ('GET', '/venues/{venue_id}', None, set()),
+  ('GET', '/venues/{venue_id}/past_shows', None, set()),
+  ('POST', '/venues/search', {'search_term': 'the'}, set()),
+  ('GET', '/artists', None, {'Artist'}),
+  ('GET', '/artists/{artist_id}', None, set()),
+  ('GET', '/artists/{artist_id}/past_shows', None, set()),
+  ('GET', '/artists?genre=Jazz', None, set()),
+  ('GET', '/genres', None, {'Genre'}),
+  ('POST', '/artists/search', {'search_term': 'the'}, set()),
+  ('GET', '/shows', None, set()),
+  ('GET', '/venues/nearby?lat=37.7749&lon=-122.4194&radius=20', None, set()),
+  ('GET', '/shows?from=2020-01-01&to=2020-12-31', None, set()),
+]
+
+def busiest_ids():
+  # the venue and artist with the most shows exercise the detail pages hardest
+  venue_id = db.session.query(Show.venue_id).group_by(Show.venue_id) \
+    .order_by(func.count(Show.id).desc()).limit(1).scalar()
+  artist_id = db.session.query(Show.artist_id).group_by(Show.artist_id) \
+    .order_by(func.count(Show.id).desc()).limit(1).scalar()
+  return {'venue_id': venue_id or 1, 'artist_id': artist_id or 1}
+
+def explain_route(client, method, url, form, allowed):
+  with capture_queries(db.engine) as queries:
+    response = client.open(url, method=method, data=form, buffered=True)
+  failures = []
+  for statement, parameters in queries:
+    scans = [table for table in sequential_scans(db.engine, statement, parameters) if table not in allowed]
+    if scans:
+      failures.append((statement, scans))
+  return response.status_code, len(queries), failures
+
+@manager.command
+def explain_routes():
+  """EXPLAIN every query of the hot routes against the configured (seeded)
+  database and fail if any of them needs a sequential scan."""
+  ids = busiest_ids()
+  backend, page_cache.backend = page_cache.backend, NullCache()
+  failed = False
+  try:
+    client = app.test_client()
+    for method, url, form, allowed in HOT_ROUTES:
+      url = url.format(**ids)
+      status, count, failures = explain_route(client, method, url, form, allowed)
+      print('{} {} -> {}, {} queries, {} sequential scans'.format(method, url, status, count, len(failures)))
+      for statement, scans in failures:
+        failed = True
+        print('  Seq Scan on {}:\n    {}'.format(', '.join(scans), ' '.join(statement.split())))
+  finally:
+    page_cache.backend = backend
+  if failed:
+    sys.exit(1)
+
+#----------------------------------------------------------------------------#
+# Synthetic data and benchmarks.
+#----------------------------------------------------------------------------#
+
+def use_scratch_database(database):
+  # every query, including the replica routed pages, goes to the scratch database
+  app.config['SQLALCHEMY_DATABASE_URI'] = database
+  app.config['SQLALCHEMY_BINDS'] = {}
+  db.create_all()
+  reset_database()
+
+@manager.option('--venues', dest='venues', type=int, default=1000)
+@manager.option('--artists', dest='artists', type=int, default=1000)
+@manager.option('--shows', dest='shows', type=int, default=10000)
+@manager.option('--seed', dest='seed', type=int, default=0)
+def seed(venues=1000, artists=1000, shows=10000, seed=0):
+  """Append synthetic venues, artists and shows generated from data/."""
+  seed_database(venues, artists, shows, seed=seed)
+  partition_shows()
+
+@manager.option('-d', '--database', dest='database', required=True,
+  help='scratch database URI; its Venue, Artist and Show rows are deleted')
+@manager.option('-s', '--scales', dest='scales', default='1000,10000,100000,1000000')
+@manager.option('-n', '--iterations', dest='iterations', type=int, default=20)
+@manager.option('-b', '--baseline', dest='baseline', default='benchmarks.json')
+@manager.option('-u', '--update-baseline', dest='update_baseline', action='store_true', default=False)
+def benchmark(database, scales='1000,10000,100000,1000000', iterations=20,
+  baseline='benchmarks.json', update_baseline=False):
+  """Seed a scratch database at growing scales and record p50/p95 latency
+  and SQL statement count for every route; fail on regressions against the
+  JSON baseline."""
+  use_scratch_database(database)
+  backend, page_cache.backend = page_cache.backend, NullCache()
+  results = {}
+  seeded = 0
+  try:
+    client = app.test_client()
+    for scale in [int(scale) for scale in scales.split(',')]:
+      # grow the same database instead of reseeding from scratch
+      seed_database(scale - seeded, scale - seeded, scale - seeded, seed=scale, log=lambda line: None)
+      seeded = scale
+      results[str(scale)] = routes = run_routes(client, db.engine, busiest_ids(), iterations)
+      for name, result in routes.items():
+        print('{:>8} {:<26} p50 {:>9.2f}ms  p95 {:>9.2f}ms  {:>4} statements'.format(
+          scale, name, result['p50_ms'], result['p95_ms'], result['statements']))
+  finally:
+    page_cache.backend = backend
+
+  if update_baseline:
+    save_baseline(baseline, results)
+    print('baseline written to {}'.format(baseline))
+    return
+  regressions = compare(results, load_baseline(baseline))
+  for line in regressions:
+    print('REGRESSION ' + line)
+  if regressions:
+    sys.exit(1)
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+
+@manager.option('--venues', dest='venues', help='CSV or JSONL file of venues')
+@manager.option('--artists', dest='artists', help='CSV or JSONL file of artists')
+@manager.option('--shows', dest='shows', help='CSV or JSONL file of shows referring to the source ids above')
+@manager.option('-b', '--batch-size', dest='batch_size', type=int, default=5000)
+@manager.option('-r', '--rejects', dest='rejects', default='rejects.jsonl')
+def import_data(venues=None, artists=None, shows=None, batch_size=5000, rejects='rejects.jsonl'):
+  """Stream venues, artists and shows into the database in batches."""
+  with open(rejects, 'w') as rejects_file:
+    loader = BulkLoader(db, (Venue, Artist, Show), datetime.now(), app.config['SHOW_DEFAULT_DURATION'],
+      app.config['SHOW_MAX_DURATION'], batch_size=batch_size, rejects=rejects_file, link_genres=link_artist_genres)
+    rejected = loader.run(venues=venues, artists=artists, shows=shows)
+  reset_sequences()
+  rebuild_venue_areas()
+  # imported shows outside the partitioned months sit in the default partition
+  partition_shows()
+  if rejected:
+    print('{} rejected rows written to {}'.format(rejected, rejects))
+
+@manager.option('-d', '--database', dest='database', required=True,
+  help='scratch database URI; its Venue, Artist and Show rows are deleted')
+@manager.option('-s', '--scales', dest='scales', default='10000,100000,1000000')
+def benchmark_export(database, scales='10000,100000,1000000'):
+  """Show that /export/shows streams in constant memory as the Show table
+  grows: peak allocation must not scale with the row count."""
+  use_scratch_database(database)
+  client = app.test_client()
+  seeded = 0
+  peaks = []
+  for scale in [int(scale) for scale in scales.split(',')]:
+    # the show count is what matters here; keep venues and artists small
+    seed_database(max(1, (scale - seeded) // 100), max(1, (scale - seeded) // 100), scale - seeded,
+      seed=scale, log=lambda line: None)
+    seeded = scale
+    for format in ('ndjson', 'csv'):
+      result = measure_stream(client, '/export/shows?format={}'.format(format))
+      peaks.append(result['peak_kb'])
+      print('{:>8} shows {:<6} {:>9} lines {:>12} bytes {:>8.2f}s  peak {:>7} KiB'.format(
+        scale, format, result['lines'], result['bytes'], result['seconds'], result['peak_kb']))
+  if max(peaks) > 4 * min(peaks):
+    print('peak memory grew with table size')
+    sys.exit(1)
+
+#----------------------------------------------------------------------------#
+# Geocoding.
+#----------------------------------------------------------------------------#
+
+@manager.option('-b', '--batch-size', dest='batch_size', type=int, default=1000)
+def geocode(batch_size=1000):
+  """Place venues that have no coordinates yet (new or edited ones)."""
+  geocoder = OfflineGeocoder()
+  placed = unresolved = 0
+  last_id = 0
+  while True:
+    rows = db.session.query(Venue.id, Venue.address, Venue.city, Venue.state) \
+      .filter(Venue.latitude.is_(None), Venue.id > last_id) \
+      .order_by(Venue.id).limit(batch_size).all()
+    if not rows:
+      break
+    updates = []
+    for venue_id, address, city, state in rows:
+      coordinates = geocoder.geocode(address, city, state)
+      if coordinates is None:
+        unresolved += 1
+        continue
+      lat, lon = coordinates
+      updates.append({'venue_id': venue_id, 'lat': lat, 'lon': lon, 'cell': geo_cell(lat, lon)})
+    if updates:
+      db.session.execute(Venue.__table__.update()
+        .where(Venue.id == db.bindparam('venue_id'))
+        .values(latitude=db.bindparam('lat'), longitude=db.bindparam('lon'), geo_cell=db.bindparam('cell')),
+        updates)
+    db.session.commit()
+    placed += len(updates)
+    last_id = rows[-1][0]
+  print('geocoded {} venues, {} unresolved'.format(placed, unresolved))
+
+@manager.option('-d', '--database', dest='database', required=True,
+  help='scratch database URI; its Venue, Artist and Show rows are deleted')
+@manager.option('-n', '--venues', dest='venues', type=int, default=100000)
+@manager.option('-q', '--queries', dest='queries', type=int, default=200)
+@manager.option('-r', '--radius', dest='radius', type=float, default=20)
+def benchmark_nearby(database, venues=100000, queries=200, radius=20):
+  """Compare the grid-indexed nearby search with a naive full scan."""
+  use_scratch_database(database)
+  seed_database(venues, 1, 0, log=lambda line: None)
+  centroids = list(CITY_COORDINATES.values())
+  calls = [(db.session, Venue, centroids[i % len(centroids)][0], centroids[i % len(centroids)][1], radius)
+    for i in range(queries)]
+  for label, function in (('grid index', nearby), ('full scan', nearby_naive)):
+    result = time_calls(function, calls)
+    print('{:>8} venues {:<10} p50 {:>9.2f}ms  p95 {:>9.2f}ms'.format(
+      venues, label, result['p50_ms'], result['p95_ms']))
+
+#----------------------------------------------------------------------------#
+# Bookings.
+#----------------------------------------------------------------------------#
+
+@manager.option('-b', '--batch-size', dest='batch_size', type=int, default=1000)
+def conflicts(batch_size=1000):
+  """List shows, archived ones included, that overlap another show at the
+  same venue or by the same artist. Each index is read once in order, so
+  this is a sort and a sweep rather than a pairwise comparison."""
+  found = 0
+  for label, key in (('venue', 'venue_id'), ('artist', 'artist_id')):
+    archived, hot = [db.session.query(getattr(model, key), model.id, model.start_time, model.duration)
+      for model in (ShowArchive, Show)]
+    rows = archived.union_all(hot) \
+      .order_by(getattr(ShowArchive, key), ShowArchive.start_time, ShowArchive.id) \
+      .execution_options(stream_results=True).yield_per(batch_size)
+    for key_id, show_id, other_id in sweep_overlaps(rows):
+      print('{} {}: show {} overlaps show {}'.format(label, key_id, show_id, other_id))
+      found += 1
+  print('{} overlapping pairs'.format(found))
+  if found:
+    sys.exit(1)
+
+#----------------------------------------------------------------------------#
+# Template filters.
+#----------------------------------------------------------------------------#
+
+@manager.option('-n', '--shows', dest='shows', type=int, default=10000)
+def benchmark_datetime(shows=10000):
+  """Time the datetime filter per call and over a /shows page with that
+  many tiles: the original parse-and-format filter against the memoized
+  formatter, cold and warm."""
+  generator = Generator()
+  values = [generator.start_time() for _ in range(shows)]
+  data = [{'venue_id': 1, 'venue_name': 'Venue', 'artist_id': 1, 'artist_name': 'Artist',
+    'artist_image_link': '', 'start_time': value} for value in values]
+  def fresh():
+    return DatetimeFormatter(app.config['DATETIME_LOCALE'], app.config['DATETIME_CACHE_SIZE']).format
+  warm = fresh()
+  per_call_us(warm, values, 'full')
+  filters = app.jinja_env.filters
+  original = filters['datetime']
+  try:
+    for label, make in (('uncached', lambda: format_datetime_uncached), ('cold cache', fresh),
+      ('warm cache', lambda: warm)):
+      call_us = per_call_us(make(), values, 'full')
+      # templates bind their filters when compiled
+      filters['datetime'] = make()
+      app.jinja_env.cache.clear()
+      with app.test_request_context('/shows'):
+        render_ms = per_call_us(lambda page: render_template('pages/shows.html', shows=page, next_url=None),
+          [data]) / 1000
+      print('{:<12} {:>8.2f}us per call  {:>9.2f}ms to render {} shows'.format(label, call_us, render_ms, shows))
+  finally:
+    filters['datetime'] = original
+    app.jinja_env.cache.clear()
+
+#----------------------------------------------------------------------------#
+# Worker boot.
+#----------------------------------------------------------------------------#
+
+@manager.option('-m', '--module', dest='module', default='wsgi')
+@manager.option('-n', '--runs', dest='runs', type=int, default=7)
+@manager.option('-t', '--top', dest='top', type=int, default=15)
+@manager.option('-b', '--baseline', dest='baseline', default='importtime.json')
+@manager.option('-u', '--update-baseline', dest='update_baseline', action='store_true', default=False)
+def benchmark_imports(module='wsgi', runs=7, top=15, baseline='importtime.json', update_baseline=False):
+  """Import the worker entry point in fresh interpreters under python
+  -X importtime and report where its boot time goes; fail if it imports
+  CLI or lazily loaded modules, or regresses against the JSON baseline."""
+  report = import_report(module, runs)
+  print('{} imported in {}ms (median of {} runs)'.format(module, report['total_ms'], runs))
+  for title, times in (('packages', report['packages']), ('modules', report['modules'])):
+    print('slowest {}:'.format(title))
+    for name, ms in sorted(times.items(), key=lambda item: -item[1])[:top]:
+      print('  {:<40} {:>8.1f}ms'.format(name, ms))
+
+  if update_baseline:
+    save_baseline(baseline, report)
+    print('baseline written to {}'.format(baseline))
+    return
+  regressions = compare_imports(report, load_baseline(baseline))
+  for line in regressions:
+    print('REGRESSION ' + line)
+  if regressions:
+    sys.exit(1)
+
+#----------------------------------------------------------------------------#
+# Concurrency.
+#----------------------------------------------------------------------------#
+
+@manager.option('-k', '--worker-classes', dest='worker_classes', default='sync,gevent')
+@manager.option('-w', '--workers', dest='workers', type=int, default=4)
+@manager.option('-c', '--clients', dest='clients', default='50,100,250,500')
+@manager.option('-s', '--seconds', dest='seconds', type=int, default=20)
+@manager.option('-p', '--port', dest='port', type=int, default=8765)
+def benchmark_concurrency(worker_classes='sync,gevent', workers=4, clients='50,100,250,500', seconds=20,
+  port=8765):
+  """Serve the configured (seeded) database with gunicorn under each worker
+  class and drive the busiest detail pages and the paged lists with growing
+  numbers of concurrent clients; report requests/sec and tail latency."""
+  ids = busiest_ids()
+  paths = [path.format(**ids) for path in CONCURRENCY_PATHS]
+  # every request goes to the database, which is where the worker class matters
+  env = {'CACHE_BACKEND': 'null', 'FRAGMENT_CACHE_BACKEND': 'null'}
+  for worker_class in worker_classes.split(','):
+    with gunicorn_server(port, worker_class, workers, env):
+      for count in [int(count) for count in clients.split(',')]:
+        result = load_test('127.0.0.1', port, paths, count, seconds)
+        print('{:<8} {:>4} clients {:>8.1f} req/s  p50 {:>8}ms  p95 {:>8}ms  p99 {:>8}ms  {:>5} errors'.format(
+          worker_class, count, result['rps'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+          result['errors']))
+
+#----------------------------------------------------------------------------#
+# Autocomplete.
+#----------------------------------------------------------------------------#
+
+@manager.option('-n', '--names', dest='names', type=int, default=1000000)
+@manager.option('-q', '--queries', dest='queries', type=int, default=10000)
+@manager.option('-u', '--updates', dest='updates', type=int, default=1000)
+@manager.option('-b', '--budget-ms', dest='budget_ms', type=float, default=1.0)
+def benchmark_autocomplete(names=1000000, queries=10000, updates=1000, budget_ms=1.0):
+  """Build the autocomplete index over that many synthetic names (no
+  database) and time top-10 lookups for 1 to 6 character prefixes, before
+  and after a batch of renames; fail if p99 exceeds the budget."""
+  generator = Generator()
+  rng = generator.rng
+  words = (VENUE_WORDS, ARTIST_WORDS)
+  rows = [(entry_id, '{} {}'.format(generator.name(words[entry_id % 2]), entry_id), int(rng.expovariate(0.2)))
+    for entry_id in range(1, names + 1)]
+  start = time.perf_counter()
+  index = PrefixIndex(rows)
+  print('built {} names in {:.2f}s, {:.1f}MB ({:.0f} bytes per name)'.format(
+    names, time.perf_counter() - start, index.nbytes() / 2 ** 20, index.nbytes() / max(names, 1)))
+  prefixes = []
+  for _ in range(queries):
+    name = rows[rng.randrange(names)][1]
+    prefixes.append((name[:rng.randint(1, 6)], 10))
+  del rows
+  def report(label):
+    result = time_calls(index.search, prefixes)
+    print('{:<20} p50 {:>7.3f}ms  p95 {:>7.3f}ms  p99 {:>7.3f}ms'.format(
+      label, result['p50_ms'], result['p95_ms'], result['p99_ms']))
+    return result['p99_ms']
+  slowest = report('lookups')
+  # renames land in the overlay until the next build
+  for _ in range(updates):
+    entry_id = rng.randint(1, names)
+    index.update(entry_id, 'Renamed {}'.format(entry_id), rng.randint(0, 50))
+  slowest = max(slowest, report('after {} renames'.format(updates)))
+  if slowest > budget_ms:
+    sys.exit(1)
@@ -11,6 +11,76 @@ DEBUG = False
 
 # Connect to the database
 SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
-SQLALCHMEY_TRACK_MODIFICATIONS = False
+SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Connection pool, per worker process: keep workers * (DATABASE_POOL_SIZE +
+# DATABASE_MAX_OVERFLOW) below the server's max_connections.
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 5))
+DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', 10))
+# Seconds to wait for a free connection before failing the request.
+DATABASE_POOL_TIMEOUT = int(os.getenv('DATABASE_POOL_TIMEOUT', 10))
+# Seconds after which a connection is replaced, before the server or a
+# proxy drops it.
+DATABASE_POOL_RECYCLE = int(os.getenv('DATABASE_POOL_RECYCLE', 1800))
+DATABASE_POOL_PRE_PING = os.getenv('DATABASE_POOL_PRE_PING', '1') == '1'
+# Postgres statement_timeout in milliseconds; 0 disables it.
+DATABASE_STATEMENT_TIMEOUT = int(os.getenv('DATABASE_STATEMENT_TIMEOUT', 15000))
 
+# Optional read replica for the read-only list and detail pages. A client
+# reads from the primary for REPLICA_PIN_SECONDS after each of its writes.
+SQLALCHEMY_BINDS = {'replica': os.getenv('REPLICA_DATABASE_URL')} if os.getenv('REPLICA_DATABASE_URL') else {}
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+# /venues is served from the VenueArea summary, which may lag the writes by
+# this many seconds; areas stale for longer are refreshed before serving.
+VENUE_AREAS_MAX_STALENESS = int(os.getenv('VENUE_AREAS_MAX_STALENESS', 30))
+
+# Number of shows rendered per /shows page.
+SHOWS_PER_PAGE = int(os.getenv('SHOWS_PER_PAGE', 30))
+
+# Largest (and default) page of /api/v1/venues and /api/v1/artists.
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+
+# The venue and artist lists are streamed: rows are fetched this many at a
+# time and the HTML is flushed every STREAM_BUFFER_SIZE template chunks.
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+STREAM_BUFFER_SIZE = int(os.getenv('STREAM_BUFFER_SIZE', 100))
+
+# Locale of the datetime template filter (default: the LC_TIME of the
+# environment) and how many formatted values it keeps.
+DATETIME_LOCALE = os.getenv('DATETIME_LOCALE')
+DATETIME_CACHE_SIZE = int(os.getenv('DATETIME_CACHE_SIZE', 4096))
+
+# Page data cache: 'local' (per-worker LRU + TTL), 'redis' (shared) or 'null'.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')
+CACHE_MAXSIZE = int(os.getenv('CACHE_MAXSIZE', 1024))
+CACHE_TTL = int(os.getenv('CACHE_TTL', 300))
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# Rendered template fragments ({% cache %} in templates), sized separately
+# so the many small tiles do not evict page data. Same backends as above.
+FRAGMENT_CACHE_BACKEND = os.getenv('FRAGMENT_CACHE_BACKEND', CACHE_BACKEND)
+FRAGMENT_CACHE_MAXSIZE = int(os.getenv('FRAGMENT_CACHE_MAXSIZE', 20000))
+FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', 3600))
+FRAGMENT_CACHE_REDIS_URL = os.getenv('FRAGMENT_CACHE_REDIS_URL', CACHE_REDIS_URL)
+
+# /venues/nearby limits (radius in miles).
+NEARBY_MAX_RADIUS = float(os.getenv('NEARBY_MAX_RADIUS', 500))
+NEARBY_RESULTS_LIMIT = int(os.getenv('NEARBY_RESULTS_LIMIT', 50))
+
+# Show lengths in minutes. Overlap checks look back SHOW_MAX_DURATION.
+SHOW_DEFAULT_DURATION = int(os.getenv('SHOW_DEFAULT_DURATION', 120))
+SHOW_MAX_DURATION = int(os.getenv('SHOW_MAX_DURATION', 720))
+
+# Show partitions (Postgres): months of past shows kept in Show besides the
+# current one, and months of partitions created ahead. Older months move to
+# ShowArchive on the next manage.py partition_shows.
+SHOW_HOT_MONTHS = int(os.getenv('SHOW_HOT_MONTHS', 3))
+SHOW_PARTITION_MONTHS_AHEAD = int(os.getenv('SHOW_PARTITION_MONTHS_AHEAD', 12))
+
+# /autocomplete: most names returned, how often a worker picks up other
+# workers' writes, and how many changed names it overlays on its index
+# before rebuilding it.
+AUTOCOMPLETE_LIMIT = int(os.getenv('AUTOCOMPLETE_LIMIT', 10))
+AUTOCOMPLETE_POLL_SECONDS = float(os.getenv('AUTOCOMPLETE_POLL_SECONDS', 1))
+AUTOCOMPLETE_OVERLAY_LIMIT = int(os.getenv('AUTOCOMPLETE_OVERLAY_LIMIT', 5000))
@@ -1,5 +1,5 @@
  
-  data1={
+data1={
     "id": 4,
     "name": "Guns N Petals",
     "genres": ["Rock n Roll"],
@@ -21,7 +21,7 @@
     "past_shows_count": 1,
     "upcoming_shows_count": 0,
   }
-  data2={
+data2={
     "id": 5,
     "name": "Matt Quevedo",
     "genres": ["Jazz"],
@@ -41,7 +41,7 @@
     "past_shows_count": 1,
     "upcoming_shows_count": 0,
   }
-  data3={
+data3={
     "id": 6,
     "name": "The Wild Sax Band",
     "genres": ["Jazz", "Classical"],
@@ -71,7 +71,7 @@
     "upcoming_shows_count": 3,
   }
 
-  original_data=[{
+original_data=[{
     "id": 4,
     "name": "Guns N Petals",
   }, {
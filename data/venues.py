@@ -1,5 +1,5 @@
 
-  data1={
+data1={
     "id": 1,
     "name": "The Musical Hop",
     "genres": ["Jazz", "Reggae", "Swing", "Classical", "Folk"],
@@ -22,7 +22,7 @@
     "past_shows_count": 1,
     "upcoming_shows_count": 0,
   }
-  data2={
+data2={
     "id": 2,
     "name": "The Dueling Pianos Bar",
     "genres": ["Classical", "R&B", "Hip-Hop"],
@@ -39,7 +39,7 @@
     "past_shows_count": 0,
     "upcoming_shows_count": 0,
   }
-  data3={
+data3={
     "id": 3,
     "name": "Park Square Live Music & Coffee",
     "genres": ["Rock n Roll", "Jazz", "Classical", "Folk"],
@@ -76,7 +76,7 @@
     "past_shows_count": 1,
     "upcoming_shows_count": 1,
   }
-    original_data=[{
+original_data=[{
     "city": "San Francisco",
     "state": "CA",
     "venues": [{
@@ -0,0 +1,121 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import event, exc, orm
+from sqlalchemy.engine.url import make_url
+
+REPLICA_BIND = 'replica'
+# Cookie set on every write; until it expires the client reads from the
+# primary so it sees its own changes despite replication lag.
+PIN_COOKIE = 'read_primary_until'
+
+
+class RoutingSession(SignallingSession):
+    """Sends the reads of views marked with use_replica to the replica
+    bind. Flushes, and everything outside those views, use the primary."""
+
+    def __init__(self, db, **options):
+        self.db = db
+        super(RoutingSession, self).__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        replica = (self.app.config.get('SQLALCHEMY_BINDS') or {}).get(REPLICA_BIND)
+        if replica and has_app_context() and g.get('use_replica') and not self._flushing:
+            return self.db.get_engine(self.app, bind=REPLICA_BIND)
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy with pool settings from the app config, a per-statement
+    timeout on Postgres, replica routing and pool checkout statistics."""
+
+    def __init__(self, app=None, **kwargs):
+        self.checkouts = Counter()
+        self.timeouts = Counter()
+        super(RoutingSQLAlchemy, self).__init__(app, **kwargs)
+
+    def init_app(self, app):
+        super(RoutingSQLAlchemy, self).init_app(app)
+        app.after_request(self.pin_writes)
+        app.teardown_request(self.count_timeouts)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        # Flask-SQLAlchemy 2.4 edits sa_url and options in place and returns
+        # nothing; the engine is created from the same objects afterwards
+        super(RoutingSQLAlchemy, self).apply_driver_hacks(app, sa_url, options)
+        config = app.config
+        options['pool_pre_ping'] = config['DATABASE_POOL_PRE_PING']
+        options['pool_recycle'] = config['DATABASE_POOL_RECYCLE']
+        # SQLite gets a NullPool or a single connection, which take no sizes
+        if sa_url.drivername != 'sqlite':
+            options.update(pool_size=config['DATABASE_POOL_SIZE'], max_overflow=config['DATABASE_MAX_OVERFLOW'],
+                           pool_timeout=config['DATABASE_POOL_TIMEOUT'])
+        if sa_url.drivername.startswith('postgresql') and config['DATABASE_STATEMENT_TIMEOUT']:
+            connect_args = options.setdefault('connect_args', {})
+            connect_args['options'] = '-c statement_timeout={}'.format(config['DATABASE_STATEMENT_TIMEOUT'])
+
+    def create_engine(self, sa_url, engine_opts):
+        engine = super(RoutingSQLAlchemy, self).create_engine(sa_url, engine_opts)
+        replica = (self.get_app().config.get('SQLALCHEMY_BINDS') or {}).get(REPLICA_BIND)
+        name = REPLICA_BIND if replica and make_url(replica) == sa_url else 'primary'
+        event.listen(engine.pool, 'checkout', lambda *args: self.checkouts.update((name,)))
+        return engine
+
+    def pool_status(self, attribute):
+        """(labels, value) per engine of a QueuePool method such as
+        checkedout, for the metrics endpoint."""
+        app = self.get_app()
+        engines = [('primary', self.get_engine(app))]
+        if (app.config.get('SQLALCHEMY_BINDS') or {}).get(REPLICA_BIND):
+            engines.append((REPLICA_BIND, self.get_engine(app, bind=REPLICA_BIND)))
+        return [({'database': name}, getattr(engine.pool, attribute)())
+                for name, engine in engines if hasattr(engine.pool, attribute)]
+
+    def dispose_engines(self, app):
+        """Close the pooled connections of every engine created for app so
+        far, e.g. in a worker forked from a process that already used them."""
+        for connector in get_state(app).connectors.values():
+            if connector._engine is not None:
+                connector._engine.dispose()
+
+    def pin_writes(self, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and current_app.config.get('SQLALCHEMY_BINDS'):
+            seconds = current_app.config['REPLICA_PIN_SECONDS']
+            response.set_cookie(PIN_COOKIE, str(int(time.time()) + seconds), max_age=seconds)
+        return response
+
+    def count_timeouts(self, error=None):
+        if isinstance(error, exc.TimeoutError):
+            self.timeouts.update((g.get('use_replica') and REPLICA_BIND or 'primary',))
+
+
+def use_replica(view):
+    """Read everything in view from the replica, unless this client wrote
+    something within the last REPLICA_PIN_SECONDS."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            pinned = int(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        g.use_replica = not pinned
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Send the block's statements to the primary, e.g. the writes a view
+    marked with use_replica has to make."""
+    previous = g.get('use_replica')
+    g.use_replica = False
+    try:
+        yield
+    finally:
+        g.use_replica = previous
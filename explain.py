@@ -0,0 +1,51 @@
+import json
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+@contextmanager
+def capture_queries(engine, selects_only=True):
+    """Collect (statement, parameters) for every statement, or every SELECT,
+    sent to engine."""
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not selects_only or statement.lstrip().upper().startswith('SELECT'):
+            queries.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _postgres_seq_scans(plan):
+    scans = []
+    if plan.get('Node Type') == 'Seq Scan':
+        scans.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        scans.extend(_postgres_seq_scans(child))
+    return scans
+
+
+def sequential_scans(engine, statement, parameters):
+    """Return the tables the planner would read in full for statement.
+
+    On Postgres sequential scans are disabled for the EXPLAIN, so one only
+    shows up when no index can serve the query at all; small seeded tables
+    therefore do not produce false positives."""
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            with conn.begin():
+                conn.execute('SET LOCAL enable_seqscan = off')
+                result = conn.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+                plan = result if isinstance(result, list) else json.loads(result)
+            return _postgres_seq_scans(plan[0]['Plan'])
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    scans = []
+    for row in rows:
+        words = row[-1].split()
+        if words[0] == 'SCAN' and 'INDEX' not in words and words[1] not in ('CONSTANT', 'SUBQUERY'):
+            scans.append(words[2] if words[1] == 'TABLE' else words[1])
+    return scans
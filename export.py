@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+# Rows are fetched from the database this many at a time.
+EXPORT_BATCH_SIZE = 1000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def stream_rows(query, columns, format):
+    """Serialize query one row at a time. On Postgres stream_results makes
+    psycopg2 use a named server-side cursor, so neither the driver nor the
+    ORM ever holds more than EXPORT_BATCH_SIZE rows."""
+    rows = query.execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+    if format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([_value(value) for value in row])
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        return
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, [_value(value) for value in row])), separators=(',', ':')))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
@@ -0,0 +1,27 @@
+from flask_moment import Moment
+from cache import PageCache
+from database import RoutingSQLAlchemy
+from metrics import Metrics
+
+# Unbound until app.create_app() calls their init_app; the caches use a
+# NullCache backend until then.
+db = RoutingSQLAlchemy()
+moment = Moment()
+page_cache = PageCache()
+fragment_cache = PageCache()
+metrics = Metrics()
+
+metrics.counter('jamspot_cache_hits_total', 'Page cache hits.', lambda: page_cache.hits)
+metrics.counter('jamspot_cache_misses_total', 'Page cache misses.', lambda: page_cache.misses)
+metrics.counter('jamspot_fragment_cache_hits_total', 'Template fragment cache hits.', lambda: fragment_cache.hits)
+metrics.counter('jamspot_fragment_cache_misses_total', 'Template fragment cache misses.',
+                lambda: fragment_cache.misses)
+metrics.counter('jamspot_db_pool_checkouts_total', 'Connections checked out of the pool.',
+                lambda: [({'database': name}, count) for name, count in sorted(db.checkouts.items())])
+metrics.counter('jamspot_db_pool_timeouts_total', 'Requests that timed out waiting for a connection.',
+                lambda: [({'database': name}, count) for name, count in sorted(db.timeouts.items())])
+metrics.gauge('jamspot_db_pool_checked_out', 'Connections currently checked out.',
+              lambda: db.pool_status('checkedout'))
+metrics.gauge('jamspot_db_pool_overflow', 'Connections open beyond the pool size.',
+              lambda: db.pool_status('overflow'))
+metrics.gauge('jamspot_db_pool_size', 'Configured pool size.', lambda: db.pool_status('size'))
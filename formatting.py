@@ -0,0 +1,72 @@
+import threading
+from datetime import datetime
+from cachetools import LRUCache
+
+# babel and dateutil are imported on first use, so importing the app (and
+# booting a worker) does not pay for their locale data.
+
+# Named formats accepted by the datetime filter; anything else is used as a
+# babel pattern as is.
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+class DatetimeFormatter(object):
+    """babel datetime formatting with the patterns and locales parsed once
+    and the formatted strings memoized in a bounded LRU. Show listings
+    repeat the same few start times, so most calls are a dict lookup."""
+
+    def __init__(self, locale=None, maxsize=4096):
+        self._default_locale = locale
+        self._locales = {}
+        self._patterns = {}
+        self._results = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    @property
+    def default_locale(self):
+        if self._default_locale is None:
+            import babel.dates
+            self._default_locale = babel.dates.LC_TIME or 'en_US'
+        return self._default_locale
+
+    def locale(self, name):
+        locale = self._locales.get(name)
+        if locale is None:
+            from babel import Locale
+            locale = self._locales[name] = Locale.parse(name)
+        return locale
+
+    def pattern(self, format):
+        pattern = self._patterns.get(format)
+        if pattern is None:
+            import babel.dates
+            pattern = self._patterns[format] = babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+        return pattern
+
+    def format(self, value, format='medium', locale=None):
+        if not isinstance(value, datetime):
+            import dateutil.parser
+            value = dateutil.parser.parse(str(value))
+        key = (value, format, locale or self.default_locale)
+        with self._lock:
+            result = self._results.get(key)
+        if result is None:
+            # babel.dates.format_datetime treats naive values as UTC
+            if value.tzinfo is None:
+                from babel.dates import UTC
+                value = value.replace(tzinfo=UTC)
+            result = self.pattern(format).apply(value, self.locale(key[2]))
+            with self._lock:
+                self._results[key] = result
+        return result
+
+
+def format_datetime_uncached(value, format='medium'):
+    """The original filter, kept as the benchmark baseline."""
+    import babel.dates
+    import dateutil.parser
+    date = dateutil.parser.parse(str(value))
+    return babel.dates.format_datetime(date, DATETIME_FORMATS.get(format, format))
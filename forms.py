@@ -1,7 +1,12 @@
 from datetime import datetime
+from flask import current_app
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, IntegerField
+from wtforms.validators import DataRequired, AnyOf, URL, NumberRange
+
+def duration_in_range(form, field):
+    # read per request so SHOW_MAX_DURATION follows the app's config
+    NumberRange(min=1, max=current_app.config['SHOW_MAX_DURATION'])(form, field)
 
 class ShowForm(FlaskForm):
     artist_id = StringField(
@@ -15,6 +20,11 @@ class ShowForm(FlaskForm):
         validators=[DataRequired()],
         default= datetime.today()
     )
+    duration = IntegerField(
+        'duration',
+        validators=[duration_in_range],
+        default=lambda: current_app.config['SHOW_DEFAULT_DURATION']
+    )
 
 class VenueForm(FlaskForm):
     name = StringField(
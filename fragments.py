@@ -0,0 +1,40 @@
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache 'show-tile', show.id, show.version, ttl=600 %}...{% endcache %}
+
+    Caches the rendered body under the given key parts in
+    environment.fragment_cache (a cache.PageCache). Put an updated_at style
+    version in the key so a changed row renders afresh instead of needing
+    an invalidation. ttl is optional and can only shorten the backend's."""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super(FragmentCacheExtension, self).__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        ttl = nodes.Const(None)
+        while parser.stream.skip_if('comma'):
+            if parser.stream.current.test('name:ttl') and parser.stream.look().test('assign'):
+                next(parser.stream)
+                next(parser.stream)
+                ttl = parser.parse_expression()
+                break
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_render', [nodes.List(parts), ttl])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, ttl, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = 'fragment:' + ':'.join(str(part) for part in parts)
+        return Markup(cache.get_or_set(key, lambda: str(caller()), ttl))
@@ -0,0 +1,104 @@
+import math
+import zlib
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Venues are bucketed into a fixed grid of CELL_DEGREES squares; a radius
+# query becomes an indexed IN lookup over the few cells its bounding box
+# touches.
+CELL_DEGREES = 0.25
+CELL_COLUMNS = int(360 / CELL_DEGREES)
+# Above this many cells the query falls back to a latitude range scan.
+MAX_CELLS = 400
+
+# Offline stand-in for a geocoding service: city centroids.
+CITY_COORDINATES = {
+    ('New York', 'NY'): (40.7128, -74.0060), ('Los Angeles', 'CA'): (34.0522, -118.2437),
+    ('Chicago', 'IL'): (41.8781, -87.6298), ('Dallas', 'TX'): (32.7767, -96.7970),
+    ('Houston', 'TX'): (29.7604, -95.3698), ('Washington', 'DC'): (38.9072, -77.0369),
+    ('Miami', 'FL'): (25.7617, -80.1918), ('Philadelphia', 'PA'): (39.9526, -75.1652),
+    ('Atlanta', 'GA'): (33.7490, -84.3880), ('Phoenix', 'AZ'): (33.4484, -112.0740),
+    ('Boston', 'MA'): (42.3601, -71.0589), ('San Francisco', 'CA'): (37.7749, -122.4194),
+    ('Seattle', 'WA'): (47.6062, -122.3321), ('Minneapolis', 'MN'): (44.9778, -93.2650),
+    ('San Diego', 'CA'): (32.7157, -117.1611), ('Denver', 'CO'): (39.7392, -104.9903),
+    ('Portland', 'OR'): (45.5051, -122.6750), ('Austin', 'TX'): (30.2672, -97.7431),
+    ('Nashville', 'TN'): (36.1627, -86.7816), ('New Orleans', 'LA'): (29.9511, -90.0715),
+    ('Oakland', 'CA'): (37.8044, -122.2712), ('Brooklyn', 'NY'): (40.6782, -73.9442),
+}
+
+
+class OfflineGeocoder(object):
+    """Resolves a venue to its city's centroid, offset by up to ~5 miles
+    derived from the street address so venues in one city spread out
+    deterministically. Returns None for unknown cities."""
+
+    spread = 0.07
+
+    def geocode(self, address, city, state):
+        centroid = CITY_COORDINATES.get(((city or '').strip(), (state or '').strip()))
+        if centroid is None:
+            return None
+        digest = zlib.crc32((address or '').encode('utf-8'))
+        lat_offset = ((digest & 0xffff) / 0xffff - 0.5) * 2 * self.spread
+        lon_offset = ((digest >> 16) / 0xffff - 0.5) * 2 * self.spread
+        return centroid[0] + lat_offset, centroid[1] + lon_offset
+
+
+def geo_cell(lat, lon):
+    row = int(math.floor((lat + 90) / CELL_DEGREES))
+    column = int(math.floor((lon + 180) / CELL_DEGREES)) % CELL_COLUMNS
+    return row * CELL_COLUMNS + column
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lon, radius):
+    lat_delta = math.degrees(radius / EARTH_RADIUS_MILES)
+    # longitude degrees shrink towards the poles
+    lon_delta = math.degrees(radius / (EARTH_RADIUS_MILES * max(math.cos(math.radians(lat)), 0.01)))
+    return max(lat - lat_delta, -90.0), min(lat + lat_delta, 90.0), lon - lon_delta, lon + lon_delta
+
+
+def cells_for_box(min_lat, max_lat, min_lon, max_lon):
+    rows = range(int(math.floor((min_lat + 90) / CELL_DEGREES)), int(math.floor((max_lat + 90) / CELL_DEGREES)) + 1)
+    columns = range(int(math.floor((min_lon + 180) / CELL_DEGREES)), int(math.floor((max_lon + 180) / CELL_DEGREES)) + 1)
+    if len(rows) * len(columns) > MAX_CELLS:
+        return None
+    return [row * CELL_COLUMNS + column % CELL_COLUMNS for row in rows for column in columns]
+
+
+def nearby(session, model, lat, lon, radius, limit=50):
+    """Venues within radius miles of (lat, lon), nearest first. SQL narrows
+    the candidates to the grid cells and bounding box; exact distances are
+    computed only for those."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius)
+    query = session.query(model.id, model.name, model.city, model.state, model.latitude, model.longitude) \
+        .filter(model.latitude.between(min_lat, max_lat))
+    cells = cells_for_box(min_lat, max_lat, min_lon, max_lon)
+    if cells is not None:
+        query = query.filter(model.geo_cell.in_(cells))
+    if min_lon >= -180 and max_lon <= 180:
+        query = query.filter(model.longitude.between(min_lon, max_lon))
+    return rank(query, lat, lon, radius, limit)
+
+
+def nearby_naive(session, model, lat, lon, radius, limit=50):
+    """Reference implementation for benchmarks: distance to every venue."""
+    query = session.query(model.id, model.name, model.city, model.state, model.latitude, model.longitude) \
+        .filter(model.latitude.isnot(None))
+    return rank(query, lat, lon, radius, limit)
+
+
+def rank(rows, lat, lon, radius, limit):
+    results = []
+    for venue_id, name, city, state, venue_lat, venue_lon in rows:
+        distance = haversine(lat, lon, venue_lat, venue_lon)
+        if distance <= radius:
+            results.append({'id': venue_id, 'name': name, 'city': city, 'state': state,
+                            'distance': round(distance, 1)})
+    results.sort(key=lambda venue: (venue['distance'], venue['id']))
+    return results[:limit]
@@ -0,0 +1,43 @@
+import os
+
+# Import the app once in the master and fork workers from it: they share
+# its memory pages and skip the imports on boot and on every restart.
+preload_app = True
+
+# 'sync' (default) serves one request per worker process at a time.
+# 'gevent' serves up to worker_connections per process as greenlets, so a
+# slow detail page only holds up its own request; it needs a Postgres
+# database (gevent and psycogreen are in the Pipfile).
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+if worker_class == 'gevent':
+    # before the app is preloaded, so every socket, lock and thread local
+    # it creates is already cooperative
+    from gevent import monkey
+    monkey.patch_all()
+    # psycopg2 waits for the server in C; this makes it yield to the other
+    # greenlets instead of blocking the worker
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+
+def post_fork(server, worker):
+    # create_app() opens no connections, but anything that touched the
+    # database while preloading left sockets every worker would share
+    from wsgi import app
+    from extensions import db
+    db.dispose_engines(app)
+
+
+def post_worker_init(worker):
+    # each worker builds its autocomplete index before taking requests, so
+    # the first /autocomplete does not wait for the bulk query
+    from wsgi import app
+    from extensions import db
+    from views.autocomplete import names
+    with app.app_context():
+        try:
+            names.load(db.session)
+        finally:
+            db.session.remove()
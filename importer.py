@@ -0,0 +1,334 @@
+import csv
+import io
+import json
+import time
+from collections import Counter
+import dateutil.parser
+from geo import geo_cell
+from models import parse_genres
+
+TRUE_VALUES = ('1', 't', 'true', 'y', 'yes', 'on')
+
+# Largest number of bound parameters per multi-row INSERT; SQLite builds
+# before 3.32 refuse more than 999.
+MAX_PARAMETERS = 900
+
+
+class Rejected(Exception):
+    pass
+
+
+def read_records(path):
+    """Yield (line number, record) from a CSV or JSONL file one record at a
+    time. record is None for a line that could not be parsed."""
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield line_number, record if isinstance(record, dict) else None
+
+
+def as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def as_text(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return ','.join(str(item) for item in value)
+    value = str(value).strip()
+    return value or None
+
+
+def as_coordinates(record):
+    try:
+        lat, lon = float(record['latitude']), float(record['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None, None, None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise Rejected('coordinates out of range')
+    return lat, lon, geo_cell(lat, lon)
+
+
+def required(record, field):
+    value = as_text(record.get(field))
+    if value is None:
+        raise Rejected('missing {}'.format(field))
+    return value
+
+
+def venue_row(record):
+    lat, lon, cell = as_coordinates(record)
+    return {
+        'name': required(record, 'name'),
+        'city': as_text(record.get('city')),
+        'state': as_text(record.get('state')),
+        'address': as_text(record.get('address')),
+        'phone': as_text(record.get('phone')),
+        'image_link': as_text(record.get('image_link')),
+        'website': as_text(record.get('website')),
+        'facebook_link': as_text(record.get('facebook_link')),
+        'seeking_talent': as_bool(record.get('seeking_talent')),
+        'talent_description': as_text(record.get('seeking_description')),
+        'latitude': lat,
+        'longitude': lon,
+        'geo_cell': cell,
+    }
+
+
+def artist_row(record):
+    # the display copy holds each genre once, like the artist form writes it
+    genres = parse_genres(as_text(record.get('genres')))
+    return {
+        'name': required(record, 'name'),
+        'city': as_text(record.get('city')),
+        'state': as_text(record.get('state')),
+        'phone': as_text(record.get('phone')),
+        'genres': ','.join(genres) or None,
+        'image_link': as_text(record.get('image_link')),
+        'website': as_text(record.get('website')),
+        'facebook_link': as_text(record.get('facebook_link')),
+        'seeking_venue': as_bool(record.get('seeking_venue')),
+        'venue_description': as_text(record.get('seeking_description')),
+    }
+
+
+class BulkLoader(object):
+    """Streams venue, artist and show files into the database in batches.
+
+    Rows are written with COPY on Postgres and multi-row INSERTs elsewhere.
+    Venues and artists get their ids reserved up front, so the source 'id'
+    of each record can be mapped to its new id in memory and shows can
+    refer to venues and artists by their source ids. Bad rows are rejected
+    and reported without stopping the load."""
+
+    def __init__(self, db, models, now, default_duration, max_duration, batch_size=5000, rejects=None, log=print,
+                 link_genres=None):
+        self.db = db
+        self.link_genres = link_genres
+        self.Venue, self.Artist, self.Show = models
+        self.now = now
+        self.default_duration = default_duration
+        self.max_duration = max_duration
+        self.batch_size = batch_size
+        self.rejects = rejects
+        self.log = log
+        self.ids = {'Venue': {}, 'Artist': {}}
+        self.show_counts = {'Venue': Counter(), 'Artist': Counter()}
+        self.rejected = 0
+
+    @property
+    def postgres(self):
+        return self.db.engine.dialect.name == 'postgresql'
+
+    def reject(self, path, line_number, reason):
+        self.rejected += 1
+        if self.rejects is not None:
+            self.rejects.write(json.dumps({'file': path, 'line': line_number, 'reason': reason}) + '\n')
+
+    def reserve_ids(self, model, count):
+        table = model.__tablename__
+        if self.postgres:
+            rows = self.db.session.execute(
+                "SELECT nextval(pg_get_serial_sequence('\"{}\"', 'id')) "
+                "FROM generate_series(1, :count)".format(table), {'count': count})
+            return [row[0] for row in rows]
+        start = (self.db.session.query(self.db.func.max(model.id)).scalar() or 0) + 1
+        return list(range(start, start + count))
+
+    def copy(self, table, columns, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+        cursor = self.db.session.connection().connection.cursor()
+        cursor.copy_expert('COPY "{}" ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            table.name, ', '.join(columns)), buffer)
+
+    def insert(self, table, columns, rows):
+        chunk = max(1, MAX_PARAMETERS // len(columns))
+        for start in range(0, len(rows), chunk):
+            self.db.session.execute(table.insert().values(rows[start:start + chunk]))
+
+    def write(self, table, rows, path):
+        """Write a batch of (line number, row) pairs and return the ones that
+        were stored. A failing batch is retried row by row so only the bad
+        rows are rejected."""
+        if not rows:
+            return []
+        columns = list(rows[0][1].keys())
+        try:
+            if self.postgres:
+                self.copy(table, columns, [row for line_number, row in rows])
+            else:
+                self.insert(table, columns, [row for line_number, row in rows])
+            self.db.session.commit()
+            return rows
+        except Exception:
+            self.db.session.rollback()
+        stored = []
+        for line_number, row in rows:
+            try:
+                self.db.session.execute(table.insert().values(row))
+                self.db.session.commit()
+                stored.append((line_number, row))
+            except Exception as e:
+                self.db.session.rollback()
+                self.reject(path, line_number, str(e).splitlines()[0])
+        return stored
+
+    def link(self, rows, path):
+        """Link the genres of stored artist rows, the whole batch at once
+        and row by row if that fails. An artist whose genres cannot be linked
+        is deleted again and rejected; returns their line numbers."""
+        try:
+            self.link_genres([(row['id'], name) for line_number, row in rows for name in parse_genres(row['genres'])])
+            self.db.session.commit()
+            return set()
+        except Exception:
+            self.db.session.rollback()
+        unlinked = set()
+        for line_number, row in rows:
+            try:
+                self.link_genres([(row['id'], name) for name in parse_genres(row['genres'])])
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                self.db.session.execute(self.Artist.__table__.delete().where(self.Artist.id == row['id']))
+                self.db.session.commit()
+                self.reject(path, line_number, str(e).splitlines()[0])
+                unlinked.add(line_number)
+        return unlinked
+
+    def load_entities(self, path, model, build_row):
+        ids = self.ids[model.__tablename__]
+        batch = []
+
+        def flush():
+            new_ids = self.reserve_ids(model, len(batch))
+            rows = []
+            for (line_number, source_id, row), new_id in zip(batch, new_ids):
+                row['id'] = new_id
+                rows.append((line_number, row))
+            stored = self.write(model.__table__, rows, path)
+            if model is self.Artist and self.link_genres is not None:
+                unlinked = self.link(stored, path)
+                stored = [(line_number, row) for line_number, row in stored if line_number not in unlinked]
+            stored = set(line_number for line_number, row in stored)
+            for line_number, source_id, row in batch:
+                if source_id is not None and line_number in stored:
+                    ids[source_id] = row['id']
+            return len(stored)
+
+        loaded = 0
+        for line_number, record in read_records(path):
+            if record is None:
+                self.reject(path, line_number, 'unparseable line')
+                continue
+            try:
+                row = build_row(record)
+            except Rejected as e:
+                self.reject(path, line_number, str(e))
+                continue
+            batch.append((line_number, as_text(record.get('id')), row))
+            if len(batch) == self.batch_size:
+                loaded += flush()
+                batch = []
+        if batch:
+            loaded += flush()
+        return loaded
+
+    def show_row(self, record):
+        venue_id = self.ids['Venue'].get(as_text(record.get('venue_id')))
+        if venue_id is None:
+            raise Rejected('unknown venue_id {}'.format(record.get('venue_id')))
+        artist_id = self.ids['Artist'].get(as_text(record.get('artist_id')))
+        if artist_id is None:
+            raise Rejected('unknown artist_id {}'.format(record.get('artist_id')))
+        try:
+            start_time = dateutil.parser.parse(required(record, 'start_time'), ignoretz=True)
+        except (ValueError, OverflowError):
+            raise Rejected('bad start_time {}'.format(record.get('start_time')))
+        duration = as_text(record.get('duration'))
+        try:
+            duration = self.default_duration if duration is None else int(duration)
+        except ValueError:
+            duration = None
+        if duration is None or not 0 < duration <= self.max_duration:
+            raise Rejected('bad duration {}'.format(record.get('duration')))
+        # on Postgres a show overlapping an existing booking fails the
+        # exclusion constraints and is rejected by the row-by-row retry
+        return {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': start_time, 'duration': duration}
+
+    def load_shows(self, path):
+        batch = []
+        loaded = 0
+
+        def flush():
+            stored = self.write(self.Show.__table__, batch, path)
+            for line_number, row in stored:
+                when = 'upcoming' if row['start_time'] > self.now else 'past'
+                self.show_counts['Venue'][(row['venue_id'], when)] += 1
+                self.show_counts['Artist'][(row['artist_id'], when)] += 1
+            return len(stored)
+
+        for line_number, record in read_records(path):
+            if record is None:
+                self.reject(path, line_number, 'unparseable line')
+                continue
+            try:
+                batch.append((line_number, self.show_row(record)))
+            except Rejected as e:
+                self.reject(path, line_number, str(e))
+                continue
+            if len(batch) == self.batch_size:
+                loaded += flush()
+                batch = []
+        if batch:
+            loaded += flush()
+        self.update_counters()
+        return loaded
+
+    def update_counters(self):
+        # one executemany per table instead of an UPDATE per imported show
+        for model in (self.Venue, self.Artist):
+            counts = self.show_counts[model.__tablename__]
+            params = {}
+            for (entity_id, when), count in counts.items():
+                entry = params.setdefault(entity_id, {'entity_id': entity_id, 'upcoming': 0, 'past': 0})
+                entry[when] = count
+            if params:
+                self.db.session.execute(model.__table__.update()
+                    .where(model.__table__.c.id == self.db.bindparam('entity_id'))
+                    .values(upcoming_shows_count=model.__table__.c.upcoming_shows_count + self.db.bindparam('upcoming'),
+                            past_shows_count=model.__table__.c.past_shows_count + self.db.bindparam('past')),
+                    list(params.values()))
+                self.db.session.commit()
+            counts.clear()
+
+    def run(self, venues=None, artists=None, shows=None):
+        for label, path, load in (('venues', venues, lambda path: self.load_entities(path, self.Venue, venue_row)),
+                                  ('artists', artists, lambda path: self.load_entities(path, self.Artist, artist_row)),
+                                  ('shows', shows, self.load_shows)):
+            if not path:
+                continue
+            rejected = self.rejected
+            start = time.perf_counter()
+            loaded = load(path)
+            elapsed = time.perf_counter() - start
+            self.log('{}: {} rows in {:.1f}s ({:.0f} rows/sec), {} rejected'.format(
+                label, loaded, elapsed, loaded / elapsed if elapsed else 0, self.rejected - rejected))
+        return self.rejected
@@ -0,0 +1,4 @@
+from commands import manager
+
+if __name__ == '__main__':
+  manager.run()
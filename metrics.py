@@ -0,0 +1,166 @@
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class Histogram(object):
+    """Prometheus style cumulative histogram with one series per endpoint."""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, value):
+        with self._lock:
+            counts = self.series.get(endpoint)
+            if counts is None:
+                # one slot per bucket, then +Inf, sum and count
+                counts = self.series[endpoint] = [0] * len(self.buckets) + [0, 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-3] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.help), '# TYPE {} histogram'.format(self.name)]
+        with self._lock:
+            series = sorted((endpoint, list(counts)) for endpoint, counts in self.series.items())
+        for endpoint, counts in series:
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                lines.append('{}_bucket{{endpoint="{}",le="{}"}} {}'.format(self.name, endpoint, bound, count))
+            lines.append('{}_sum{{endpoint="{}"}} {}'.format(self.name, endpoint, counts[-2]))
+            lines.append('{}_count{{endpoint="{}"}} {}'.format(self.name, endpoint, counts[-1]))
+        return lines
+
+
+class TimedTemplate(Template):
+    """Adds the time spent rendering the page to the request's metrics."""
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super(TimedTemplate, self).render(*args, **kwargs)
+        finally:
+            if has_request_context() and 'render_time' in g:
+                g.render_time += time.perf_counter() - start
+
+    def generate(self, *args, **kwargs):
+        # streamed pages: time spent producing each chunk, which includes
+        # fetching the rows the chunk renders
+        chunks = super(TimedTemplate, self).generate(*args, **kwargs)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                if has_request_context() and 'render_time' in g:
+                    g.render_time += time.perf_counter() - start
+            yield chunk
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'db_time' in g:
+        g.db_queries += 1
+        g.db_time += elapsed
+
+
+class Metrics(object):
+    """Per request query count, DB time and render time, returned in a
+    Server-Timing header and aggregated per endpoint on /metrics. The
+    numbers are per worker process; Prometheus sums them across workers."""
+
+    def __init__(self, app=None):
+        self.request_duration = Histogram('jamspot_request_duration_seconds',
+                                          'Time spent handling the request.', LATENCY_BUCKETS)
+        self.db_duration = Histogram('jamspot_db_duration_seconds',
+                                     'Time spent executing SQL per request.', LATENCY_BUCKETS)
+        self.render_duration = Histogram('jamspot_render_duration_seconds',
+                                         'Time spent rendering templates per request.', LATENCY_BUCKETS)
+        self.db_queries = Histogram('jamspot_db_queries',
+                                    'SQL statements executed per request.', QUERY_BUCKETS)
+        self.counters = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.jinja_env.template_class = TimedTemplate
+        # listen on the Engine class so engines created later are covered too
+        if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def counter(self, name, help, value):
+        """Export value() as a Prometheus counter. value() returns a number,
+        or a list of (labels dict, number) pairs for a labelled series."""
+        self.counters.append((name, help, 'counter', value))
+
+    def gauge(self, name, help, value):
+        """Export value() as a Prometheus gauge; see counter()."""
+        self.counters.append((name, help, 'gauge', value))
+
+    def before_request(self):
+        g.request_start = time.perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+        g.render_time = 0.0
+
+    def after_request(self, response):
+        if 'request_start' not in g:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        if response.is_streamed:
+            # the body is rendered after this hook, so observe once it is
+            # sent; the headers are gone by then, hence no Server-Timing
+            state = g._get_current_object()
+            response.call_on_close(lambda: self.observe(endpoint, state))
+            return response
+        total = self.observe(endpoint, g)
+        response.headers['Server-Timing'] = 'db;dur={:.2f};desc="{} queries", render;dur={:.2f}, total;dur={:.2f}'.format(
+            g.db_time * 1000, g.db_queries, g.render_time * 1000, total * 1000)
+        return response
+
+    def render(self):
+        lines = []
+        for histogram in (self.request_duration, self.db_duration, self.render_duration, self.db_queries):
+            lines.extend(histogram.render())
+        for name, help, kind, value in self.counters:
+            lines.extend(['# HELP {} {}'.format(name, help), '# TYPE {} {}'.format(name, kind)])
+            current = value()
+            if not isinstance(current, list):
+                current = [({}, current)]
+            for labels, number in current:
+                label_text = ','.join('{}="{}"'.format(key, labels[key]) for key in sorted(labels))
+                lines.append('{}{} {}'.format(name, '{' + label_text + '}' if label_text else '', number))
+        return '\n'.join(lines) + '\n'
+
+    def observe(self, endpoint, state):
+        total = time.perf_counter() - state.request_start
+        self.request_duration.observe(endpoint, total)
+        self.db_duration.observe(endpoint, state.db_time)
+        self.render_duration.observe(endpoint, state.render_time)
+        self.db_queries.observe(endpoint, state.db_queries)
+        return total
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
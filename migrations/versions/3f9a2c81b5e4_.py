@@ -0,0 +1,67 @@
+"""add full text and trigram search indexes
+
+Revision ID: 3f9a2c81b5e4
+Revises: 7d55a1aa846c
+Create Date: 2026-10-18 10:02:11.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a2c81b5e4'
+down_revision = '7d55a1aa846c'
+branch_labels = None
+depends_on = None
+
+
+# search_vector is kept current by a trigger so every write path (ORM,
+# query.update() and raw SQL) maintains it. Weights follow search.SEARCH_FIELDS.
+VECTORS = {
+    'Venue': "setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') || "
+             "setweight(to_tsvector('simple', coalesce(NEW.city, '')), 'B') || "
+             "setweight(to_tsvector('simple', coalesce(NEW.state, '')), 'C')",
+    'Artist': "setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') || "
+              "setweight(to_tsvector('simple', coalesce(NEW.city, '')), 'B') || "
+              "setweight(to_tsvector('simple', coalesce(NEW.genres, '')), 'C')",
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, vector in VECTORS.items():
+        name = table.lower()
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute("""
+            CREATE FUNCTION {name}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+              NEW.search_vector := {vector};
+              RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql""".format(name=name, vector=vector))
+        op.execute('CREATE TRIGGER {name}_search_vector_trigger BEFORE INSERT OR UPDATE '
+                   'ON "{table}" FOR EACH ROW EXECUTE PROCEDURE {name}_search_vector_update()'
+                   .format(name=name, table=table))
+        # fire the trigger once to backfill existing rows
+        op.execute('UPDATE "{table}" SET name = name'.format(table=table))
+        op.execute('CREATE INDEX ix_{name}_search_vector ON "{table}" USING gin (search_vector)'
+                   .format(name=name, table=table))
+        op.execute('CREATE INDEX ix_{name}_name_trgm ON "{table}" USING gin (lower(name) gin_trgm_ops)'
+                   .format(name=name, table=table))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in VECTORS:
+        name = table.lower()
+        op.execute('DROP INDEX IF EXISTS ix_{name}_name_trgm'.format(name=name))
+        op.execute('DROP INDEX IF EXISTS ix_{name}_search_vector'.format(name=name))
+        op.execute('DROP TRIGGER IF EXISTS {name}_search_vector_trigger ON "{table}"'
+                   .format(name=name, table=table))
+        op.execute('DROP FUNCTION IF EXISTS {name}_search_vector_update()'.format(name=name))
+        op.drop_column(table, 'search_vector')
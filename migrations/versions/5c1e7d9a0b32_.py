@@ -0,0 +1,42 @@
+"""add denormalized show counters
+
+Revision ID: 5c1e7d9a0b32
+Revises: 3f9a2c81b5e4
+Create Date: 2026-10-18 11:40:52.903614
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7d9a0b32'
+down_revision = '3f9a2c81b5e4'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = '''
+UPDATE "{table}" SET
+  upcoming_shows_count = (SELECT count(*) FROM "Show"
+    WHERE "Show".{fk} = "{table}".id AND "Show".start_time > :now),
+  past_shows_count = (SELECT count(*) FROM "Show"
+    WHERE "Show".{fk} = "{table}".id AND "Show".start_time <= :now)
+'''
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), nullable=False, server_default='0'))
+    now = datetime.now()
+    op.get_bind().execute(sa.text(BACKFILL.format(table='Venue', fk='venue_id')), now=now)
+    op.get_bind().execute(sa.text(BACKFILL.format(table='Artist', fk='artist_id')), now=now)
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
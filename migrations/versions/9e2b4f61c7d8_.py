@@ -0,0 +1,29 @@
+"""add composite indexes for hot routes
+
+Revision ID: 9e2b4f61c7d8
+Revises: 5c1e7d9a0b32
+Create Date: 2026-10-18 13:15:27.660129
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2b4f61c7d8'
+down_revision = '5c1e7d9a0b32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_show_start_time_id', 'Show', ['start_time', 'id'], unique=False)
+    op.create_index('ix_venue_city_state', 'Venue', ['city', 'state'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_venue_city_state', table_name='Venue')
+    op.drop_index('ix_show_start_time_id', table_name='Show')
+    op.drop_index('ix_show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='Show')
@@ -0,0 +1,31 @@
+"""add created_at and version columns
+
+Revision ID: a7e0c3d91f46
+Revises: f1c94d3e7a58
+Create Date: 2026-10-18 19:12:05.381904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7e0c3d91f46'
+down_revision = 'f1c94d3e7a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        op.add_column(table, sa.Column('created_at', sa.DateTime(), nullable=False,
+                                       server_default=sa.func.current_timestamp()))
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        # the best creation time existing rows have
+        op.execute('UPDATE "{}" SET created_at = updated_at'.format(table))
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        op.drop_column(table, 'version')
+        op.drop_column(table, 'created_at')
@@ -0,0 +1,42 @@
+"""add VenueArea summary table
+
+Revision ID: b3d7e2f8a614
+Revises: a7e0c3d91f46
+Create Date: 2026-10-18 20:41:37.219530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d7e2f8a614'
+down_revision = 'a7e0c3d91f46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('VenueArea',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('city', sa.String(length=120), nullable=False),
+        sa.Column('state', sa.String(length=120), nullable=False),
+        sa.Column('venues', sa.Text(), nullable=False, server_default='[]'),
+        sa.Column('venue_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('upcoming_shows_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Column('stale_since', sa.DateTime(), nullable=True),
+        sa.Column('claim', sa.String(length=32), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('city', 'state', name='uq_venue_area_city_state')
+    )
+    op.create_index(op.f('ix_VenueArea_stale_since'), 'VenueArea', ['stale_since'], unique=False)
+    # one empty row per area, stale since forever: the first /venues request
+    # (or manage.py refresh_venue_areas) fills them in
+    op.execute("INSERT INTO \"VenueArea\" (city, state, stale_since) "
+               "SELECT DISTINCT coalesce(city, ''), coalesce(state, ''), '1970-01-01' FROM \"Venue\"")
+
+
+def downgrade():
+    op.drop_index(op.f('ix_VenueArea_stale_since'), table_name='VenueArea')
+    op.drop_table('VenueArea')
@@ -0,0 +1,30 @@
+"""add updated_at columns
+
+Revision ID: b48d0e2a6f17
+Revises: 9e2b4f61c7d8
+Create Date: 2026-10-18 15:04:39.117532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b48d0e2a6f17'
+down_revision = '9e2b4f61c7d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        # the server default backfills existing rows and covers COPY loads
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                       server_default=sa.func.current_timestamp()))
+        op.create_index('ix_{}_updated_at'.format(table), table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        op.drop_index('ix_{}_updated_at'.format(table), table_name=table)
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,75 @@
+"""normalize artist genres
+
+Revision ID: c7a53e19d2f0
+Revises: b48d0e2a6f17
+Create Date: 2026-10-18 16:21:05.774310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a53e19d2f0'
+down_revision = 'b48d0e2a6f17'
+branch_labels = None
+depends_on = None
+
+
+# the choices offered by VenueForm and ArtistForm
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk', 'Hip-Hop',
+          'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae',
+          'Rock n Roll', 'Soul', 'Other']
+
+
+def parse_genres(value):
+    names = []
+    for name in (value or '').strip('{}').split(','):
+        name = name.strip().strip('"')
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade():
+    genre = op.create_table('Genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('artist_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    artist_genres = op.create_table('artist_genres',
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('artist_id', 'genre_id')
+    )
+    op.create_index('ix_artist_genres_genre_id_artist_id', 'artist_genres', ['genre_id', 'artist_id'], unique=False)
+
+    # backfill from the comma separated Artist.genres strings
+    bind = op.get_bind()
+    pairs = []
+    names = list(GENRES)
+    for artist_id, value in bind.execute(sa.text('SELECT id, genres FROM "Artist"')):
+        for name in parse_genres(value):
+            pairs.append((artist_id, name))
+            if name not in names:
+                names.append(name)
+    counts = dict((name, 0) for name in names)
+    for artist_id, name in pairs:
+        counts[name] += 1
+    op.bulk_insert(genre, [{'id': index, 'name': name, 'artist_count': counts[name]}
+                           for index, name in enumerate(names, 1)])
+    ids = dict((name, index) for index, name in enumerate(names, 1))
+    if pairs:
+        op.bulk_insert(artist_genres, [{'artist_id': artist_id, 'genre_id': ids[name]} for artist_id, name in pairs])
+    if bind.dialect.name == 'postgresql':
+        op.execute('SELECT setval(pg_get_serial_sequence(\'"Genre"\', \'id\'), {})'.format(len(names)))
+
+
+def downgrade():
+    op.drop_index('ix_artist_genres_genre_id_artist_id', table_name='artist_genres')
+    op.drop_table('artist_genres')
+    op.drop_table('Genre')
@@ -0,0 +1,145 @@
+"""partition Show by month and add the ShowArchive tier
+
+Revision ID: c9e4a1d7b352
+Revises: b3d7e2f8a614
+Create Date: 2026-10-18 21:26:04.512877
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e4a1d7b352'
+down_revision = 'b3d7e2f8a614'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = 'id, artist_id, venue_id, start_time, duration, updated_at, created_at, version'
+SHOW_PERIOD = "tsrange(start_time, start_time + duration * interval '1 minute')"
+# partitions created ahead of the current month; manage.py partition_shows
+# keeps the horizon moving after this
+MONTHS_AHEAD = 12
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return datetime(value.year + month // 12, month % 12 + 1, 1)
+
+
+def add_overlap_constraints(table):
+    # exclusion constraints cannot span partitions, so each partition gets its
+    # own; create_show_submission still checks across month boundaries
+    op.execute('ALTER TABLE "{0}" ADD CONSTRAINT "{0}_venue_no_overlap" '
+               'EXCLUDE USING gist (venue_id WITH =, {1} WITH &&)'.format(table, SHOW_PERIOD))
+    op.execute('ALTER TABLE "{0}" ADD CONSTRAINT "{0}_artist_no_overlap" '
+               'EXCLUDE USING gist (artist_id WITH =, {1} WITH &&)'.format(table, SHOW_PERIOD))
+
+
+def archive_table():
+    op.create_table('ShowArchive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('artist_id', sa.Integer(), nullable=False),
+        sa.Column('venue_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('duration', sa.Integer(), nullable=False, server_default='120'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_show_archive_venue_id_start_time', 'ShowArchive', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_archive_artist_id_start_time', 'ShowArchive', ['artist_id', 'start_time'],
+                    unique=False)
+
+
+def upgrade():
+    # other databases keep one Show table; partition_shows moves old rows
+    # into a plain ShowArchive table instead
+    if op.get_bind().dialect.name != 'postgresql':
+        archive_table()
+        return
+    bind = op.get_bind()
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_unpartitioned"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+    # the key, indexes and constraints are added after the old table is
+    # dropped: their names are still taken until then
+    op.execute("""
+        CREATE TABLE "Show" (
+          id integer NOT NULL DEFAULT nextval('"Show_id_seq"'),
+          artist_id integer NOT NULL REFERENCES "Artist" (id),
+          venue_id integer NOT NULL REFERENCES "Venue" (id),
+          start_time timestamp without time zone NOT NULL,
+          duration integer NOT NULL DEFAULT 120 CONSTRAINT show_duration_positive CHECK (duration > 0),
+          updated_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          version integer NOT NULL DEFAULT 1
+        ) PARTITION BY RANGE (start_time)""")
+    # rows outside every monthly partition land here until partition_shows
+    # gives their month a partition
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+
+    first, last = bind.execute('SELECT min(start_time), max(start_time) FROM "Show_unpartitioned"').first()
+    month = add_months(first or datetime.now(), 0)
+    end = max(add_months(last or datetime.now(), 1), add_months(datetime.now(), MONTHS_AHEAD + 1))
+    months = []
+    while month < end:
+        months.append(month)
+        month = add_months(month, 1)
+    for month in months:
+        op.execute('CREATE TABLE "Show_{0:%Y_%m}" PARTITION OF "Show" FOR VALUES FROM (\'{0:%Y-%m-%d}\') '
+                   'TO (\'{1:%Y-%m-%d}\')'.format(month, add_months(month, 1)))
+    op.execute('INSERT INTO "Show" ({0}) SELECT {0} FROM "Show_unpartitioned"'.format(COLUMNS))
+    op.execute('DROP TABLE "Show_unpartitioned"')
+
+    # the partition key has to be part of the primary key
+    op.execute('ALTER TABLE "Show" ADD PRIMARY KEY (id, start_time)')
+    op.create_index('ix_show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_show_start_time_id', 'Show', ['start_time', 'id'], unique=False)
+    op.create_index('ix_Show_updated_at', 'Show', ['updated_at'], unique=False)
+    try:
+        for table in ['Show_default'] + ['Show_{:%Y_%m}'.format(month) for month in months]:
+            add_overlap_constraints(table)
+    except sa.exc.IntegrityError as e:
+        raise RuntimeError('Existing shows overlap; list them with "python manage.py conflicts" '
+                           'and resolve them before upgrading.\n{}'.format(e))
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+
+    # partition_shows moves whole months here by detaching them from "Show"
+    # and attaching them to "ShowArchive", without copying a row
+    op.execute('CREATE TABLE "ShowArchive" (LIKE "Show" INCLUDING CONSTRAINTS) PARTITION BY RANGE (start_time)')
+    op.create_index('ix_show_archive_venue_id_start_time', 'ShowArchive', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_archive_artist_id_start_time', 'ShowArchive', ['artist_id', 'start_time'],
+                    unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.drop_index('ix_show_archive_artist_id_start_time', table_name='ShowArchive')
+        op.drop_index('ix_show_archive_venue_id_start_time', table_name='ShowArchive')
+        op.drop_table('ShowArchive')
+        return
+    # archived months come back into Show; partitions detached with
+    # partition_shows --detach are standalone tables and stay as they are
+    op.execute('CREATE TABLE "Show_unpartitioned" (LIKE "Show" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    for table in ('Show', 'ShowArchive'):
+        op.execute('INSERT INTO "Show_unpartitioned" ({0}) SELECT {0} FROM "{1}"'.format(COLUMNS, table))
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+    op.execute('DROP TABLE "ShowArchive"')
+    op.execute('DROP TABLE "Show"')
+    op.execute('ALTER TABLE "Show_unpartitioned" RENAME TO "Show"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    op.execute('ALTER TABLE "Show" ADD PRIMARY KEY (id)')
+    op.create_foreign_key('Show_artist_id_fkey', 'Show', 'Artist', ['artist_id'], ['id'])
+    op.create_foreign_key('Show_venue_id_fkey', 'Show', 'Venue', ['venue_id'], ['id'])
+    op.create_index('ix_show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_show_start_time_id', 'Show', ['start_time', 'id'], unique=False)
+    op.create_index('ix_Show_updated_at', 'Show', ['updated_at'], unique=False)
+    op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_venue_no_overlap '
+               'EXCLUDE USING gist (venue_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
+    op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_artist_no_overlap '
+               'EXCLUDE USING gist (artist_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
@@ -0,0 +1,27 @@
+"""add Genre.updated_at
+
+Revision ID: d6f2b8e4a190
+Revises: c9e4a1d7b352
+Create Date: 2026-10-18 23:02:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6f2b8e4a190'
+down_revision = 'c9e4a1d7b352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Genre', sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                     server_default=sa.func.current_timestamp()))
+    op.create_index('ix_Genre_updated_at', 'Genre', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Genre_updated_at', table_name='Genre')
+    op.drop_column('Genre', 'updated_at')
@@ -0,0 +1,31 @@
+"""add ShowArchiveRun
+
+Revision ID: e3a7c9d1f524
+Revises: d6f2b8e4a190
+Create Date: 2026-10-18 23:41:17.093562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a7c9d1f524'
+down_revision = 'd6f2b8e4a190'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ShowArchiveRun',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cutoff', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ShowArchiveRun_updated_at', 'ShowArchiveRun', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_ShowArchiveRun_updated_at', table_name='ShowArchiveRun')
+    op.drop_table('ShowArchiveRun')
@@ -0,0 +1,24 @@
+"""add show duration
+
+Revision ID: e5b27c40a9d1
+Revises: d3f8a61b4c29
+Create Date: 2026-10-18 19:10:44.532871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b27c40a9d1'
+down_revision = 'd3f8a61b4c29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('duration', sa.Integer(), server_default='120', nullable=False))
+
+
+def downgrade():
+    op.drop_column('Show', 'duration')
@@ -0,0 +1,43 @@
+"""add show overlap exclusion constraints
+
+Revision ID: f1c94d3e7a58
+Revises: e5b27c40a9d1
+Create Date: 2026-10-18 19:12:09.886402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c94d3e7a58'
+down_revision = 'e5b27c40a9d1'
+branch_labels = None
+depends_on = None
+
+
+SHOW_PERIOD = "tsrange(start_time, start_time + duration * interval '1 minute')"
+
+
+def upgrade():
+    # other databases rely on the check in create_show_submission alone
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    try:
+        op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_venue_no_overlap '
+                   'EXCLUDE USING gist (venue_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
+        op.execute('ALTER TABLE "Show" ADD CONSTRAINT show_artist_no_overlap '
+                   'EXCLUDE USING gist (artist_id WITH =, {} WITH &&)'.format(SHOW_PERIOD))
+    except sa.exc.IntegrityError as e:
+        raise RuntimeError('Existing shows overlap; list them with "python manage.py conflicts" '
+                           'and resolve them before upgrading.\n{}'.format(e))
+    op.create_check_constraint('show_duration_positive', 'Show', 'duration > 0')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_constraint('show_duration_positive', 'Show', type_='check')
+    op.execute('ALTER TABLE "Show" DROP CONSTRAINT show_artist_no_overlap')
+    op.execute('ALTER TABLE "Show" DROP CONSTRAINT show_venue_no_overlap')
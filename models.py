@@ -0,0 +1,312 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app, g
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+
+class Venue(db.Model):
+    __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_venue_city_state', 'city', 'state'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    website = db.Column(db.String(120))
+    facebook_link = db.Column(db.String(120))
+    seeking_talent = db.Column(db.Boolean,nullable = True)
+    talent_description = db.Column(db.String(500), nullable= True)
+    # filled in by the geocode command; geo_cell is the geo.geo_cell() grid bucket
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geo_cell = db.Column(db.Integer, nullable=True, index=True)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+      server_default=func.current_timestamp(), index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+      server_default=func.current_timestamp())
+    # incremented in SQL by every UPDATE, from a flush or a query.update()
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.text('version + 1'))
+    venues = db.relationship('Show',backref= 'locate', lazy = True)
+
+class Artist(db.Model):
+    __tablename__ = 'Artist'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    # comma separated display copy of the artist_genres rows
+    genres = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_venue  = db.Column(db.Boolean, nullable = True)
+    venue_description = db.Column(db.String(500),nullable = True)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+      server_default=func.current_timestamp(), index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+      server_default=func.current_timestamp())
+    # incremented in SQL by every UPDATE, from a flush or a query.update()
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.text('version + 1'))
+    artists = db.relationship('Show',backref= 'perform', lazy=True)
+
+
+artist_genres = db.Table('artist_genres',
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
+    # precomputed number of artists tagged with the genre
+    artist_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # moved by every UPDATE of the count, so /genres can be revalidated
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+      server_default=func.current_timestamp(), index=True)
+
+
+class Show(db.Model):
+  __tablename__ = "Show"
+  __table_args__ = (
+    db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+    db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+    db.Index('ix_show_start_time_id', 'start_time', 'id'),
+  )
+  # on Postgres the table is partitioned by month on start_time, so its key
+  # there is (id, start_time); ids still come from a single sequence
+  id = db.Column(db.Integer,primary_key = True)
+  artist_id = db.Column(db.Integer,db.ForeignKey('Artist.id'),nullable = False)
+  venue_id = db.Column(db.Integer,db.ForeignKey('Venue.id'),nullable = False)
+  start_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+  # minutes; never more than SHOW_MAX_DURATION so overlap checks stay bounded
+  duration = db.Column(db.Integer, nullable=False, default=120, server_default='120')
+  updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+    server_default=func.current_timestamp(), index=True)
+  created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+    server_default=func.current_timestamp())
+  version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.text('version + 1'))
+
+
+class ShowArchive(db.Model):
+  # shows from months past the hot window, moved out of Show by
+  # manage.py partition_shows; only the past-show listings read it
+  __tablename__ = "ShowArchive"
+  __table_args__ = (
+    db.Index('ix_show_archive_venue_id_start_time', 'venue_id', 'start_time'),
+    db.Index('ix_show_archive_artist_id_start_time', 'artist_id', 'start_time'),
+  )
+  id = db.Column(db.Integer, primary_key=True)
+  artist_id = db.Column(db.Integer, nullable=False)
+  venue_id = db.Column(db.Integer, nullable=False)
+  start_time = db.Column(db.DateTime, nullable=False)
+  duration = db.Column(db.Integer, nullable=False, server_default='120')
+  updated_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+  created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+  version = db.Column(db.Integer, nullable=False, server_default='1')
+
+
+class ShowArchiveRun(db.Model):
+  # written in each transaction that moves shows out of Show. Rows leaving
+  # update nothing left in Show, so table_versions(Show) reads this as well.
+  __tablename__ = "ShowArchiveRun"
+  id = db.Column(db.Integer, primary_key=True)
+  # the shows that started before cutoff were moved
+  cutoff = db.Column(db.DateTime, nullable=False)
+  updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+    server_default=func.current_timestamp(), index=True)
+
+
+class VenueArea(db.Model):
+    # materialized /venues rollup, one row per (city, state); the write
+    # paths mark it stale and refresh_venue_area() rebuilds it
+    __tablename__ = 'VenueArea'
+    __table_args__ = (
+        db.UniqueConstraint('city', 'state', name='uq_venue_area_city_state'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    # '' for venues without one
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    # JSON list of {id, name, upcoming_shows_count}, ordered by id
+    venues = db.Column(db.Text, nullable=False, default='[]', server_default='[]')
+    venue_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+        server_default=func.current_timestamp())
+    # time of the first write since the last refresh; null while current
+    stale_since = db.Column(db.DateTime, nullable=True, index=True)
+    # token of the refresh allowed to write the row
+    claim = db.Column(db.String(32), nullable=True)
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+def request_now():
+  # read the clock once per request so every past/upcoming split agrees
+  if 'now' not in g:
+    g.now = datetime.now()
+  return g.now
+
+def count_new_show(show):
+  # bump the denormalized counters in the same transaction as the insert;
+  # reconcile_counts moves them from upcoming to past as time passes
+  column = 'upcoming_shows_count' if show.start_time > request_now() else 'past_shows_count'
+  for model, entity_id in ((Venue, show.venue_id), (Artist, show.artist_id)):
+    db.session.query(model).filter(model.id == entity_id) \
+      .update({column: getattr(model, column) + 1}, synchronize_session=False)
+  if column == 'upcoming_shows_count':
+    mark_venue_areas_stale([show.venue_id])
+
+def touch_show_partners(model, entity_id):
+  # the venue and artist pages list the name and image of the other side of
+  # each show and are versioned by their own row alone, so an edit bumps the
+  # rows on the other side of the entity's shows, archived ones included
+  other, show_fk, other_fk = (Artist, 'venue_id', 'artist_id') if model is Venue else (Venue, 'artist_id', 'venue_id')
+  partners = db.union(*[db.select([getattr(table.c, other_fk)]).where(getattr(table.c, show_fk) == entity_id)
+    for table in (Show.__table__, ShowArchive.__table__)])
+  db.session.query(other).filter(other.id.in_(partners)) \
+    .update({'updated_at': datetime.utcnow()}, synchronize_session=False)
+
+def find_conflicts(venue_id, artist_id, start_time, duration):
+  # an overlapping booking must start within (start - longest show, end), so
+  # this is a bounded range scan on the (venue_id|artist_id, start_time) indexes
+  end_time = start_time + timedelta(minutes=duration)
+  earliest = start_time - timedelta(minutes=current_app.config['SHOW_MAX_DURATION'])
+  candidates = db.session.query(Show.id, Show.start_time, Show.duration) \
+    .filter(or_(Show.venue_id == venue_id, Show.artist_id == artist_id),
+      Show.start_time > earliest, Show.start_time < end_time)
+  return [show_id for show_id, other_start, other_duration in candidates
+    if other_start + timedelta(minutes=other_duration) > start_time]
+
+def parse_genres(value):
+  # form lists, comma separated strings and legacy '{Jazz,Folk}' values
+  if isinstance(value, str):
+    value = value.strip('{}').split(',')
+  names = []
+  for name in value or []:
+    name = name.strip().strip('"')
+    if name and name not in names:
+      names.append(name)
+  return names
+
+def genre_ids(names):
+  # name -> id, creating genres that do not exist yet
+  ids = dict(db.session.query(Genre.name, Genre.id).filter(Genre.name.in_(names)))
+  for name in names:
+    if name not in ids:
+      genre = Genre(name=name, artist_count=0)
+      db.session.add(genre)
+      db.session.flush()
+      ids[name] = genre.id
+  return ids
+
+def link_artist_genres(pairs):
+  # bulk insert (artist_id, genre name) pairs and bump the per-genre counts
+  pairs = list(pairs)
+  if not pairs:
+    return
+  ids = genre_ids(sorted(set(name for artist_id, name in pairs)))
+  db.session.execute(artist_genres.insert(),
+    [{'artist_id': artist_id, 'genre_id': ids[name]} for artist_id, name in pairs])
+  added = {}
+  for artist_id, name in pairs:
+    added[ids[name]] = added.get(ids[name], 0) + 1
+  db.session.execute(Genre.__table__.update()
+    .where(Genre.id == db.bindparam('genre_id'))
+    .values(artist_count=Genre.artist_count + db.bindparam('added')),
+    [{'genre_id': genre_id, 'added': count} for genre_id, count in added.items()])
+
+def set_artist_genres(artist_id, names):
+  current = dict(db.session.query(Genre.name, Genre.id).join(artist_genres)
+    .filter(artist_genres.c.artist_id == artist_id))
+  removed = [genre_id for name, genre_id in current.items() if name not in names]
+  if removed:
+    db.session.execute(artist_genres.delete().where(db.and_(
+      artist_genres.c.artist_id == artist_id, artist_genres.c.genre_id.in_(removed))))
+    db.session.query(Genre).filter(Genre.id.in_(removed)) \
+      .update({'artist_count': Genre.artist_count - 1}, synchronize_session=False)
+  link_artist_genres([(artist_id, name) for name in names if name not in current])
+
+#----------------------------------------------------------------------------#
+# Venue areas.
+#----------------------------------------------------------------------------#
+
+def in_area(city, state):
+  # areas key a missing city or state as ''
+  return [column == value if value else or_(column.is_(None), column == '')
+    for column, value in ((Venue.city, city), (Venue.state, state))]
+
+def mark_area_stale(city, state):
+  # in the writer's transaction. Only a current row is updated, so a burst
+  # of writes to one area takes its row lock once, not once per write.
+  city, state = city or '', state or ''
+  now = datetime.utcnow()
+  marked = db.session.query(VenueArea) \
+    .filter(VenueArea.city == city, VenueArea.state == state, VenueArea.stale_since.is_(None)) \
+    .update({'stale_since': now}, synchronize_session=False)
+  if marked or db.session.query(VenueArea.id).filter(VenueArea.city == city, VenueArea.state == state).first():
+    return
+  try:
+    with db.session.begin_nested():
+      db.session.add(VenueArea(city=city, state=state, stale_since=now))
+  except IntegrityError:
+    # a concurrent writer created it, already stale
+    pass
+
+def mark_venue_areas_stale(venue_ids):
+  for city, state in db.session.query(Venue.city, Venue.state).filter(Venue.id.in_(venue_ids)).distinct():
+    mark_area_stale(city, state)
+
+def stale_venue_areas(max_staleness):
+  # ids of the areas stale for longer than max_staleness seconds
+  cutoff = datetime.utcnow() - timedelta(seconds=max_staleness)
+  return [area_id for area_id, in db.session.query(VenueArea.id).filter(VenueArea.stale_since <= cutoff)]
+
+def refresh_venue_area(area_id):
+  # Two short transactions, so readers and writers never wait on a refresh.
+  # The first clears the stale mark: a write committed after it marks the
+  # area again, one committed before it is read below. Its claim token
+  # keeps a slower concurrent refresh from overwriting a newer one.
+  claim = uuid.uuid4().hex
+  claimed = db.session.query(VenueArea) \
+    .filter(VenueArea.id == area_id, VenueArea.stale_since.isnot(None)) \
+    .update({'stale_since': None, 'claim': claim}, synchronize_session=False)
+  db.session.commit()
+  if not claimed:
+    return False
+  city, state = db.session.query(VenueArea.city, VenueArea.state).filter(VenueArea.id == area_id).one()
+  venues = [{'id': venue_id, 'name': name, 'upcoming_shows_count': upcoming}
+    for venue_id, name, upcoming in db.session.query(Venue.id, Venue.name, Venue.upcoming_shows_count)
+      .filter(*in_area(city, state)).order_by(Venue.id)]
+  db.session.query(VenueArea).filter(VenueArea.id == area_id, VenueArea.claim == claim) \
+    .update({'venues': json.dumps(venues), 'venue_count': len(venues),
+      'upcoming_shows_count': sum(venue['upcoming_shows_count'] for venue in venues),
+      'refreshed_at': datetime.utcnow()}, synchronize_session=False)
+  db.session.commit()
+  return True
+
+def rebuild_venue_areas():
+  # after bulk loads, which bypass the write paths: a row for every area
+  # with venues, then every row refreshed
+  existing = set(db.session.query(VenueArea.city, VenueArea.state))
+  areas = set((city or '', state or '') for city, state in db.session.query(Venue.city, Venue.state).distinct())
+  db.session.add_all([VenueArea(city=city, state=state) for city, state in sorted(areas - existing)])
+  db.session.query(VenueArea).update({'stale_since': datetime.utcnow()}, synchronize_session=False)
+  db.session.commit()
+  area_ids = [area_id for area_id, in db.session.query(VenueArea.id).order_by(VenueArea.id)]
+  return sum(refresh_venue_area(area_id) for area_id in area_ids)
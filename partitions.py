@@ -0,0 +1,139 @@
+import re
+from datetime import datetime
+from sqlalchemy import select
+from models import Show, ShowArchive, ShowArchiveRun
+
+# On Postgres "Show" is range partitioned by month on start_time, with a
+# default partition for rows no month covers yet. Months older than the hot
+# window are detached and attached under "ShowArchive" as they are, so the
+# pages that only want upcoming shows never plan around history.
+DEFAULT_PARTITION = 'Show_default'
+SHOW_PERIOD = "tsrange(start_time, start_time + duration * interval '1 minute')"
+BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return datetime(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return 'Show_{:%Y_%m}'.format(month)
+
+
+def month_bounds(month):
+    return "FROM ('{:%Y-%m-%d}') TO ('{:%Y-%m-%d}')".format(month, add_months(month, 1))
+
+
+def is_partitioned(session, table):
+    if session.get_bind().dialect.name != 'postgresql':
+        return False
+    return session.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)',
+                           {'table': '"{}"'.format(table)}).scalar() is not None
+
+
+def table_exists(session, table):
+    return session.execute('SELECT to_regclass(:table)', {'table': '"{}"'.format(table)}).scalar() is not None
+
+
+def partitions(session, table):
+    """(name, start, end) of table's monthly partitions, oldest first."""
+    rows = session.execute('SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i '
+                           'JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table)',
+                           {'table': '"{}"'.format(table)})
+    result = []
+    for name, bound in rows:
+        match = BOUND.search(bound)
+        if match:
+            start, end = [datetime.strptime(value[:10], '%Y-%m-%d') for value in match.groups()]
+            result.append((name, start, end))
+    return sorted(result, key=lambda partition: partition[1])
+
+
+def create_partition(session, month):
+    """Give month its partition of "Show", moving in any of its rows that
+    landed in the default partition."""
+    name = partition_name(month)
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    session.execute('CREATE TABLE "{}" (LIKE "Show" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'.format(name))
+    session.execute('WITH moved AS (DELETE FROM "{}" WHERE start_time >= :start AND start_time < :end '
+                    'RETURNING *) INSERT INTO "{}" SELECT * FROM moved'.format(DEFAULT_PARTITION, name), bounds)
+    # attaching adds the primary key and indexes of "Show"; exclusion
+    # constraints cannot span partitions, so each one carries its own
+    session.execute('ALTER TABLE "Show" ATTACH PARTITION "{}" FOR VALUES {}'.format(name, month_bounds(month)))
+    for column in ('venue', 'artist'):
+        session.execute('ALTER TABLE "{0}" ADD CONSTRAINT "{0}_{1}_no_overlap" '
+                        'EXCLUDE USING gist ({1}_id WITH =, {2} WITH &&)'.format(name, column, SHOW_PERIOD))
+    return name
+
+
+def record_archive(session, cutoff):
+    # in the moving transaction, so the version of "Show" moves with it
+    session.add(ShowArchiveRun(cutoff=cutoff))
+
+
+def archive_partition(session, name, start, detach=False):
+    """Move a month out of "Show": under "ShowArchive", or with detach left
+    as a standalone table to dump and drop."""
+    session.execute('ALTER TABLE "Show" DETACH PARTITION "{}"'.format(name))
+    record_archive(session, add_months(start, 1))
+    if not detach:
+        session.execute('ALTER TABLE "ShowArchive" ATTACH PARTITION "{}" FOR VALUES {}'
+                        .format(name, month_bounds(start)))
+
+
+def archive_rows(session, cutoff, batch_size=5000):
+    """Without partitions: move the shows that started before cutoff into
+    ShowArchive a batch at a time. Returns the number moved."""
+    columns = [column.name for column in Show.__table__.columns]
+    moved = 0
+    while True:
+        ids = [show_id for show_id, in session.query(Show.id).filter(Show.start_time < cutoff)
+               .order_by(Show.id).limit(batch_size)]
+        if not ids:
+            return moved
+        session.execute(ShowArchive.__table__.insert().from_select(columns,
+            select([Show.__table__.c[column] for column in columns]).where(Show.id.in_(ids))))
+        session.query(Show).filter(Show.id.in_(ids)).delete(synchronize_session=False)
+        record_archive(session, cutoff)
+        session.commit()
+        moved += len(ids)
+
+
+def maintain_show_partitions(session, now, hot_months, months_ahead, detach=False, batch_size=5000, log=print):
+    """Create the partitions of the months up to months_ahead and of any
+    month with rows in the default partition, then archive the months that
+    ended more than hot_months before now. One transaction per partition,
+    so each lock is held briefly."""
+    cutoff = add_months(month_start(now), -hot_months)
+    if not is_partitioned(session, 'Show'):
+        log('moved {} shows before {:%Y-%m-%d} to ShowArchive'.format(
+            archive_rows(session, cutoff, batch_size), cutoff))
+        return
+    hot = set(start for name, start, end in partitions(session, 'Show'))
+    archived = set(start for name, start, end in partitions(session, 'ShowArchive'))
+    stranded = set(month_start(month) for month, in session.execute(
+        'SELECT DISTINCT date_trunc(\'month\', start_time) FROM "{}"'.format(DEFAULT_PARTITION)))
+    wanted = stranded | set(add_months(cutoff, months) for months in range(hot_months + months_ahead + 1))
+    for month in sorted(wanted - hot):
+        if month in archived:
+            # a show back-dated into a month already archived
+            session.execute('WITH moved AS (DELETE FROM "{}" WHERE start_time >= :start AND start_time < :end '
+                            'RETURNING *) INSERT INTO "ShowArchive" SELECT * FROM moved'.format(DEFAULT_PARTITION),
+                            {'start': month, 'end': add_months(month, 1)})
+            log('moved stranded shows into {}'.format(partition_name(month)))
+        elif table_exists(session, partition_name(month)):
+            log('skipped {}: a detached table of that name exists'.format(partition_name(month)))
+            continue
+        else:
+            log('created {}'.format(create_partition(session, month)))
+        session.commit()
+    for name, start, end in partitions(session, 'Show'):
+        if end <= cutoff:
+            archive_partition(session, name, start, detach)
+            session.commit()
+            log('{} {}'.format('detached' if detach else 'archived', name))
@@ -0,0 +1,73 @@
+from sqlalchemy import func, case, or_, literal_column
+
+# Columns matched for each searchable table. The Postgres migration builds
+# the search_vector column from the same fields, weighted in this order.
+SEARCH_FIELDS = {
+    'Venue': ('name', 'city', 'state'),
+    'Artist': ('name', 'city', 'genres'),
+}
+
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SearchBackend(object):
+    """Builds one ranked query returning every match together with its
+    stored upcoming show count. Subclasses supply the dialect specific
+    match and rank expressions."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def match(self, model, term):
+        raise NotImplementedError
+
+    def search(self, model, term):
+        term = (term or '').strip().lower()
+        if not term:
+            return []
+        condition, rank = self.match(model, term)
+        rows = self.session.query(model.id, model.name, model.upcoming_shows_count) \
+            .filter(condition) \
+            .order_by(rank.desc(), model.name, model.id).all()
+        return [{"id": id, "name": name, "num_upcoming_shows": num_upcoming_shows}
+                for id, name, num_upcoming_shows in rows]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Full text match on the trigger maintained search_vector column, plus
+    substring matches on the name served by the pg_trgm index."""
+
+    def match(self, model, term):
+        vector = literal_column('"{}".search_vector'.format(model.__tablename__))
+        query = func.plainto_tsquery('simple', term)
+        name = func.lower(model.name)
+        condition = or_(vector.op('@@')(query),
+                        name.like('%' + escape_like(term) + '%', escape='\\'))
+        rank = func.ts_rank(vector, query) + func.similarity(name, term)
+        return condition, rank
+
+
+class SimpleSearchBackend(SearchBackend):
+    """Portable fallback (SQLite): substring match on every search field,
+    ranking name prefixes above name substrings above other fields."""
+
+    def match(self, model, term):
+        pattern = escape_like(term)
+        columns = [func.lower(func.coalesce(getattr(model, field), ''))
+                   for field in SEARCH_FIELDS[model.__tablename__]]
+        condition = or_(*[column.like('%' + pattern + '%', escape='\\') for column in columns])
+        rank = case([(columns[0].like(pattern + '%', escape='\\'), 2),
+                     (columns[0].like('%' + pattern + '%', escape='\\'), 1)], else_=0)
+        return condition, rank
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(session):
+    dialect = session.get_bind().dialect.name
+    return BACKENDS.get(dialect, SimpleSearchBackend)(session)
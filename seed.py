@@ -0,0 +1,245 @@
+import random
+from array import array
+from bisect import bisect
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from extensions import db
+from models import Venue, Artist, Show, ShowArchive, Genre, VenueArea, artist_genres, link_artist_genres, \
+    rebuild_venue_areas
+from forms import VenueForm
+from data import artists as artist_fixtures, venues as venue_fixtures
+from geo import OfflineGeocoder, geo_cell
+
+# The hand written fixtures are the templates for every generated row.
+VENUE_TEMPLATES = [venue_fixtures.data1, venue_fixtures.data2, venue_fixtures.data3]
+ARTIST_TEMPLATES = [artist_fixtures.data1, artist_fixtures.data2, artist_fixtures.data3]
+
+GENRES = [choice for choice, label in VenueForm.genres.kwargs['choices']]
+
+# (city, state, relative weight) - roughly metro population in millions.
+CITIES = [
+    ('New York', 'NY', 19.8), ('Los Angeles', 'CA', 13.2), ('Chicago', 'IL', 9.5),
+    ('Dallas', 'TX', 7.6), ('Houston', 'TX', 7.1), ('Washington', 'DC', 6.3),
+    ('Miami', 'FL', 6.1), ('Philadelphia', 'PA', 6.1), ('Atlanta', 'GA', 6.0),
+    ('Phoenix', 'AZ', 4.9), ('Boston', 'MA', 4.9), ('San Francisco', 'CA', 4.7),
+    ('Seattle', 'WA', 4.0), ('Minneapolis', 'MN', 3.7), ('San Diego', 'CA', 3.3),
+    ('Denver', 'CO', 3.0), ('Portland', 'OR', 2.5), ('Austin', 'TX', 2.3),
+    ('Nashville', 'TN', 2.0), ('New Orleans', 'LA', 1.3),
+]
+
+VENUE_WORDS = (['The', 'Blue', 'Velvet', 'Golden', 'Rusty', 'Electric', 'Dueling', 'Park Square'],
+               ['Hop', 'Room', 'Lounge', 'Hall', 'Tavern', 'Pianos Bar', 'Live Music & Coffee', 'Garage'])
+ARTIST_WORDS = (['Guns N', 'The Wild', 'Matt', 'Midnight', 'Neon', 'Velvet', 'Lonesome', 'Brass'],
+                ['Petals', 'Sax Band', 'Quevedo', 'Ramblers', 'Collective', 'Trio', 'Kings', 'Orchestra'])
+
+# Shows cluster on Friday/Saturday evenings; index is datetime.weekday().
+WEEKDAY_WEIGHTS = [0.6, 0.5, 0.8, 1.0, 1.6, 2.2, 1.3]
+
+# Evening slots (minutes after midnight) far enough apart that shows of
+# SHOW_DURATION never overlap, so seeded data satisfies the booking
+# constraints.
+SHOW_SLOTS = [18 * 60, 20 * 60 + 30, 23 * 60]
+SHOW_DURATION = 120
+# Attempts at a free venue and artist slot before a show is dropped.
+BOOKING_ATTEMPTS = 20
+
+
+def cumulative(weights):
+    total = 0.0
+    result = []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def zipf_cum_weights(n, s=1.1):
+    # a few venues and artists host most of the shows
+    return cumulative(1.0 / rank ** s for rank in range(1, n + 1))
+
+
+class Generator(object):
+    """Deterministic source of synthetic venues, artists and shows."""
+
+    def __init__(self, seed=0, now=None):
+        self.rng = random.Random(seed)
+        self.now = now or datetime.now()
+        self.city_weights = cumulative(weight for city, state, weight in CITIES)
+        self.weekday_weights = cumulative(WEEKDAY_WEIGHTS)
+        self.geocoder = OfflineGeocoder()
+
+    def pick(self, cum_weights):
+        return bisect(cum_weights, self.rng.random() * cum_weights[-1])
+
+    def name(self, words):
+        first, second = words
+        return '{} {}'.format(self.rng.choice(first), self.rng.choice(second))
+
+    def genres(self):
+        return ','.join(self.rng.sample(GENRES, self.rng.randint(1, 3)))
+
+    def venue(self, venue_id):
+        template = VENUE_TEMPLATES[venue_id % len(VENUE_TEMPLATES)]
+        city, state, weight = CITIES[self.pick(self.city_weights)]
+        address = '{} {}'.format(self.rng.randint(1, 9999), template['address'].split(' ', 1)[1])
+        lat, lon = self.geocoder.geocode(address, city, state)
+        return {
+            'id': venue_id,
+            'name': self.name(VENUE_WORDS),
+            'city': city,
+            'state': state,
+            'address': address,
+            'latitude': lat,
+            'longitude': lon,
+            'geo_cell': geo_cell(lat, lon),
+            'phone': template['phone'],
+            'image_link': template['image_link'],
+            'website': template.get('website'),
+            'facebook_link': template.get('facebook_link'),
+            'seeking_talent': self.rng.random() < 0.3,
+            'talent_description': template.get('seeking_description'),
+        }
+
+    def artist(self, artist_id):
+        template = ARTIST_TEMPLATES[artist_id % len(ARTIST_TEMPLATES)]
+        city, state, weight = CITIES[self.pick(self.city_weights)]
+        return {
+            'id': artist_id,
+            'name': self.name(ARTIST_WORDS),
+            'city': city,
+            'state': state,
+            'phone': template['phone'],
+            'genres': self.genres(),
+            'image_link': template['image_link'],
+            'website': template.get('website'),
+            'facebook_link': template.get('facebook_link'),
+            'seeking_venue': self.rng.random() < 0.4,
+            'venue_description': template.get('seeking_description'),
+        }
+
+    def start_time(self):
+        # two years of history, one year of bookings ahead
+        day = self.now.date() + timedelta(days=self.rng.randint(-730, 365))
+        while self.pick(self.weekday_weights) != day.weekday():
+            day += timedelta(days=1)
+        minutes = self.rng.choice(SHOW_SLOTS)
+        return datetime(day.year, day.month, day.day) + timedelta(minutes=minutes)
+
+
+def next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def insert_batches(table, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+
+def reset_sequences():
+    if db.engine.dialect.name != 'postgresql':
+        return
+    # archived shows keep their ids, so the Show sequence stays past them too
+    for table, sources in (('Venue', ['Venue']), ('Artist', ['Artist']), ('Show', ['Show', 'ShowArchive'])):
+        highest = ', '.join('(SELECT max(id) FROM "{}")'.format(source) for source in sources)
+        db.session.execute('SELECT setval(pg_get_serial_sequence(\'"{0}"\', \'id\'), '
+                           'coalesce(greatest({1}), 1))'.format(table, highest))
+    db.session.commit()
+
+
+def reset_database():
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute('TRUNCATE "Show", "ShowArchive", artist_genres, "Venue", "Artist", "VenueArea" '
+                           'RESTART IDENTITY')
+    else:
+        db.session.execute(artist_genres.delete())
+        for model in (Show, ShowArchive, Venue, Artist, VenueArea):
+            db.session.query(model).delete()
+    db.session.query(Genre).update({'artist_count': 0})
+    db.session.commit()
+
+
+def seed_database(venues, artists, shows, batch_size=5000, seed=0, log=print):
+    """Append venues, artists and shows to the database, with the
+    denormalized show counters and venue areas already filled in."""
+    generator = Generator(seed)
+    venue_base, artist_base, show_base = next_id(Venue), next_id(Artist), \
+        max(next_id(Show), next_id(ShowArchive))
+
+    # pick every show first (compactly) so the counters can be written along
+    # with the venue and artist rows instead of in a second pass
+    venue_weights = zipf_cum_weights(venues)
+    artist_weights = zipf_cum_weights(artists)
+    show_venues, show_artists, show_times = array('l'), array('l'), []
+    counts = {
+        'venue_upcoming': array('l', [0]) * venues, 'venue_past': array('l', [0]) * venues,
+        'artist_upcoming': array('l', [0]) * artists, 'artist_past': array('l', [0]) * artists,
+    }
+    # slots are fixed, so two shows overlap exactly when they share a start time
+    venue_booked, artist_booked = set(), set()
+    for _ in range(shows):
+        for attempt in range(BOOKING_ATTEMPTS):
+            if attempt < BOOKING_ATTEMPTS // 2:
+                venue, artist = generator.pick(venue_weights), generator.pick(artist_weights)
+            else:
+                # the busiest venues and artists may be fully booked
+                venue, artist = generator.rng.randrange(venues), generator.rng.randrange(artists)
+            start_time = generator.start_time()
+            if (venue, start_time) not in venue_booked and (artist, start_time) not in artist_booked:
+                break
+        else:
+            continue
+        venue_booked.add((venue, start_time))
+        artist_booked.add((artist, start_time))
+        show_venues.append(venue)
+        show_artists.append(artist)
+        show_times.append(start_time)
+        when = 'upcoming' if start_time > generator.now else 'past'
+        counts['venue_' + when][venue] += 1
+        counts['artist_' + when][artist] += 1
+
+    def venue_rows():
+        for index in range(venues):
+            row = generator.venue(venue_base + index)
+            row['upcoming_shows_count'] = counts['venue_upcoming'][index]
+            row['past_shows_count'] = counts['venue_past'][index]
+            yield row
+
+    genre_pairs = []
+
+    def artist_rows():
+        for index in range(artists):
+            row = generator.artist(artist_base + index)
+            genre_pairs.extend((row['id'], name) for name in row['genres'].split(','))
+            row['upcoming_shows_count'] = counts['artist_upcoming'][index]
+            row['past_shows_count'] = counts['artist_past'][index]
+            yield row
+
+    def show_rows():
+        for index in range(len(show_times)):
+            yield {
+                'id': show_base + index,
+                'venue_id': venue_base + show_venues[index],
+                'artist_id': artist_base + show_artists[index],
+                'start_time': show_times[index],
+                'duration': SHOW_DURATION,
+            }
+
+    insert_batches(Venue.__table__, venue_rows(), batch_size)
+    log('seeded {} venues'.format(venues))
+    insert_batches(Artist.__table__, artist_rows(), batch_size)
+    for start in range(0, len(genre_pairs), batch_size):
+        link_artist_genres(genre_pairs[start:start + batch_size])
+        db.session.commit()
+    log('seeded {} artists'.format(artists))
+    insert_batches(Show.__table__, show_rows(), batch_size)
+    log('seeded {} shows'.format(len(show_times)))
+    reset_sequences()
+    log('refreshed {} venue areas'.format(rebuild_venue_areas()))
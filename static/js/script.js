@@ -2,3 +2,29 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Past shows live in the archive tier; fetch them the first time their
+// section is expanded. toggle does not bubble, so listen while capturing.
+document.addEventListener('toggle', function (event) {
+  var details = event.target;
+  if (!details.open || !details.getAttribute('data-src') || details.getAttribute('data-loaded')) {
+    return;
+  }
+  details.setAttribute('data-loaded', 'true');
+  fetch(details.getAttribute('data-src'), {credentials: 'same-origin'})
+    .then(function (response) { return response.text(); })
+    .then(function (html) { details.querySelector('.row').innerHTML = html; });
+}, true);
+
+// A page of past shows ends with a link to the next one; load it in place.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest && event.target.closest('.past-shows-more a');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  var more = link.parentNode;
+  fetch(link.getAttribute('href'), {credentials: 'same-origin'})
+    .then(function (response) { return response.text(); })
+    .then(function (html) { more.outerHTML = html; });
+});
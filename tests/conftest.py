@@ -0,0 +1,23 @@
+import os
+import pytest
+from app import create_app
+from cache import NullCache
+from extensions import db, page_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    # an empty database per test; modules that need seed data override this
+    app = create_app()
+    database = os.getenv('TEST_DATABASE_URL') or 'sqlite:///{}'.format(tmp_path / 'test.db')
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, SQLALCHEMY_DATABASE_URI=database, SQLALCHEMY_BINDS={})
+    with app.app_context():
+        db.create_all()
+    backend, page_cache.backend = page_cache.backend, NullCache()
+    try:
+        yield app
+    finally:
+        page_cache.backend = backend
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
@@ -0,0 +1,78 @@
+from datetime import datetime
+import pytest
+from extensions import db
+from models import Venue, Artist, Show
+
+
+@pytest.fixture
+def venue_id(app):
+    with app.app_context():
+        venue = Venue(name='The Hall', city='Austin', state='TX')
+        artist = Artist(name='The Band', city='Austin', state='TX')
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        db.session.add(Show(venue_id=venue.id, artist_id=artist.id, start_time=datetime(2030, 6, 1, 20, 0)))
+        db.session.commit()
+        return venue.id
+
+
+def revalidate(client, path, etag):
+    return client.get(path, headers={'If-None-Match': '"{}"'.format(etag)})
+
+
+def test_unchanged_venue_is_not_modified(app, venue_id):
+    client = app.test_client()
+    path = '/api/v1/venues/{}'.format(venue_id)
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    etag, _ = response.get_etag()
+    assert response.get_json()['name'] == 'The Hall'
+    response = revalidate(client, path, etag)
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.get_etag() == (etag, False)
+
+
+def test_editing_the_other_side_of_a_show_moves_the_etag(app, venue_id):
+    client = app.test_client()
+    path = '/api/v1/venues/{}'.format(venue_id)
+    etag, _ = client.get(path).get_etag()
+    with app.app_context():
+        artist_id = db.session.query(Artist.id).scalar()
+    # the venue lists the artist's name, so renaming the artist bumps the venue
+    client.post('/artists/{}/edit'.format(artist_id), data={
+        'name': 'The Renamed Band', 'city': 'Austin', 'state': 'TX', 'facebook_link': '', 'image_link': '',
+        'website': '', 'genres': ['Jazz']})
+    response = revalidate(client, path, etag)
+    assert response.status_code == 200
+    assert response.get_json()['upcoming_shows'][0]['artist_name'] == 'The Renamed Band'
+
+
+def test_a_new_show_moves_the_venue_etag(app, venue_id):
+    client = app.test_client()
+    path = '/api/v1/venues/{}'.format(venue_id)
+    etag, _ = client.get(path).get_etag()
+    with app.app_context():
+        artist_id = db.session.query(Artist.id).scalar()
+    client.post('/shows/create', data={'venue_id': venue_id, 'artist_id': artist_id,
+                                       'start_time': '2030-07-01T20:00:00', 'duration': 120})
+    response = revalidate(client, path, etag)
+    assert response.status_code == 200
+    assert response.get_json()['upcoming_shows_count'] == 2
+
+
+def test_list_etag_moves_with_the_table(app, venue_id):
+    client = app.test_client()
+    etag, _ = client.get('/api/v1/venues').get_etag()
+    assert revalidate(client, '/api/v1/venues', etag).status_code == 304
+    with app.app_context():
+        db.session.add(Venue(name='The Annex', city='Austin', state='TX'))
+        db.session.commit()
+    response = revalidate(client, '/api/v1/venues', etag)
+    assert response.status_code == 200
+    assert [venue['name'] for venue in response.get_json()['data']] == ['The Hall', 'The Annex']
+
+
+def test_missing_venue_is_not_found(app):
+    assert app.test_client().get('/api/v1/venues/1').status_code == 404
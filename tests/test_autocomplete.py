@@ -0,0 +1,75 @@
+import random
+from autocomplete import PrefixIndex, normalize
+
+WORDS = ['blue', 'black', 'blues', 'bright', 'brass', 'band', 'bar', 'red', 'rock', 'roll']
+
+
+def expected(rows, prefix, limit):
+    # the brute force answer: every match, highest rank first, then by name
+    key = normalize(prefix)
+    matches = [(-rank, normalize(name), entry_id, name) for entry_id, name, rank in rows
+               if name and normalize(name).startswith(key)]
+    return [(entry_id, name, -negative_rank) for negative_rank, _, entry_id, name in sorted(matches)[:limit]]
+
+
+def test_normalize_folds_case_and_space():
+    assert normalize('  The   BLUE\tNote ') == 'the blue note'
+    assert normalize(None) == ''
+
+
+def test_search_ranks_like_brute_force():
+    generator = random.Random(7)
+    rows = [(entry_id, '{} {} {}'.format(generator.choice(WORDS), generator.choice(WORDS), entry_id),
+             generator.randrange(5)) for entry_id in range(1, 400)]
+    index = PrefixIndex(rows)
+    assert len(index) == len(rows)
+    for prefix in ('b', 'BL', 'blue b', 'r', 'rock roll 1', 'zz', ''):
+        for limit in (1, 3, 10, 1000):
+            assert index.search(prefix, limit) == (expected(rows, prefix, limit) if normalize(prefix) else [])
+
+
+def test_ties_go_to_the_alphabetically_first_name():
+    index = PrefixIndex([(1, 'Bb', 2), (2, 'ba', 2), (3, 'bc', 5), (4, None, 9)])
+    assert len(index) == 3
+    assert [entry_id for entry_id, name, rank in index.search('b')] == [3, 2, 1]
+    assert index.search('') == []
+    assert index.search('b', 0) == []
+
+
+def test_updates_match_a_rebuild():
+    generator = random.Random(11)
+    rows = {entry_id: ('{} {}'.format(generator.choice(WORDS), entry_id), generator.randrange(5))
+            for entry_id in range(1, 200)}
+    index = PrefixIndex((entry_id, name, rank) for entry_id, (name, rank) in rows.items())
+    for step in range(300):
+        entry_id = generator.randrange(1, 260)
+        name, rank = rows.get(entry_id, ('{} {}'.format(generator.choice(WORDS), entry_id), 0))
+        change = generator.randrange(3)
+        if change == 0:
+            rank = generator.randrange(10)
+            index.update(entry_id, name, rank)
+        elif change == 1:
+            # a rename keeps the rank
+            name = '{} {}'.format(generator.choice(WORDS), entry_id)
+            index.update(entry_id, name)
+        else:
+            name = '{} {}'.format(generator.choice(WORDS), entry_id)
+            rank = generator.randrange(10)
+            index.update(entry_id, name, rank)
+        rows[entry_id] = (name, rank)
+    current = [(entry_id, name, rank) for entry_id, (name, rank) in rows.items()]
+    for prefix in ('b', 'bl', 'blue', 'r', 'ro'):
+        assert index.search(prefix, 15) == expected(current, prefix, 15)
+        assert PrefixIndex(current).search(prefix, 15) == expected(current, prefix, 15)
+
+
+def test_rename_drops_the_old_name():
+    index = PrefixIndex([(1, 'Blue Note', 3), (2, 'Blackbird', 1)])
+    index.update(1, 'Red Room')
+    assert index.search('blue') == []
+    assert index.search('red') == [(1, 'Red Room', 3)]
+    index.update(1, 'Redder Room', 0)
+    assert index.search('red') == [(1, 'Redder Room', 0)]
+    index.update(3, 'Bluebird', 7)
+    assert index.search('b') == [(3, 'Bluebird', 7), (2, 'Blackbird', 1)]
+    assert index.overlay_size() == 2
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+import views.shows
+from booking import sweep_overlaps
+from extensions import db
+from models import Venue, Artist, Show
+
+START = datetime(2030, 6, 1, 20, 0)
+BOOKED = 'already booked at that time'
+
+
+def test_sweep_overlaps_pairs_running_shows():
+    rows = [
+        (1, 10, START, 120),
+        (1, 11, START + timedelta(minutes=60), 120),
+        # starts as show 10 ends: touching is not overlapping
+        (1, 12, START + timedelta(minutes=120), 30),
+        # same times at another venue
+        (2, 13, START, 120),
+        (2, 14, START + timedelta(minutes=180), 60),
+    ]
+    assert list(sweep_overlaps(rows)) == [(1, 10, 11), (1, 11, 12)]
+
+
+def test_sweep_overlaps_nested_shows():
+    rows = [(1, 10, START, 240), (1, 11, START + timedelta(minutes=30), 30), (1, 12, START + timedelta(minutes=90), 30)]
+    assert list(sweep_overlaps(rows)) == [(1, 10, 11), (1, 10, 12)]
+
+
+@pytest.fixture
+def booked(app):
+    with app.app_context():
+        venue = Venue(name='The Hall', city='Austin', state='TX')
+        artist = Artist(name='The Band', city='Austin', state='TX')
+        other = Artist(name='The Other Band', city='Austin', state='TX')
+        db.session.add_all([venue, artist, other])
+        db.session.flush()
+        db.session.add(Show(venue_id=venue.id, artist_id=artist.id, start_time=START, duration=120))
+        db.session.commit()
+        return venue.id, artist.id, other.id
+
+
+def book(app, venue_id, artist_id, start_time, duration=120):
+    return app.test_client().post('/shows/create', data={
+        'venue_id': venue_id, 'artist_id': artist_id, 'start_time': start_time.isoformat(), 'duration': duration})
+
+
+def show_count(app):
+    with app.app_context():
+        return db.session.query(Show).count()
+
+
+def test_overlapping_booking_is_rejected(app, booked):
+    venue_id, artist_id, other_id = booked
+    # another artist at the same venue an hour into the booked show
+    response = book(app, venue_id, other_id, START + timedelta(minutes=60))
+    assert BOOKED in response.get_data(as_text=True)
+    assert show_count(app) == 1
+
+
+def test_booking_after_the_show_ends_is_listed(app, booked):
+    venue_id, artist_id, other_id = booked
+    response = book(app, venue_id, other_id, START + timedelta(minutes=120))
+    assert 'Show was successfully listed!' in response.get_data(as_text=True)
+    assert show_count(app) == 2
+
+
+def test_concurrent_booking_trips_the_exclusion_constraint(app, booked, monkeypatch):
+    venue_id, artist_id, other_id = booked
+    # the other request commits between our check and our insert: the check
+    # sees nothing and the insert fails on the no_overlap constraint, which
+    # only Postgres has, so it is raised here as the driver would
+    monkeypatch.setattr(views.shows, 'find_conflicts', lambda *args: [])
+    with app.app_context():
+        engine = db.engine
+
+    def no_overlap(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO "Show"'):
+            raise IntegrityError(statement, parameters,
+                Exception('conflicting key value violates exclusion constraint "Show_venue_no_overlap"'))
+
+    event.listen(engine, 'before_cursor_execute', no_overlap)
+    try:
+        response = book(app, venue_id, other_id, START + timedelta(minutes=60))
+    finally:
+        event.remove(engine, 'before_cursor_execute', no_overlap)
+    body = response.get_data(as_text=True)
+    assert BOOKED in body
+    assert 'An error occurred' not in body
+    assert show_count(app) == 1
@@ -0,0 +1,72 @@
+from datetime import datetime
+import pytest
+from werkzeug.http import http_date
+from extensions import db
+from models import Artist
+
+WRITTEN = datetime(2030, 1, 1, 12, 0, 0, 100)
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        db.session.add(Artist(name='The Band', city='Austin', state='TX'))
+        db.session.commit()
+        set_updated_at(WRITTEN)
+    return app.test_client()
+
+
+def set_updated_at(value):
+    # a raw UPDATE, so the onupdate default does not replace the value
+    db.session.execute(Artist.__table__.update().values(updated_at=value))
+    db.session.commit()
+
+
+def test_page_sends_last_modified_and_etag(client):
+    response = client.get('/artists')
+    assert response.status_code == 200
+    assert response.last_modified == WRITTEN.replace(microsecond=0)
+    assert response.get_etag()[0]
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+
+def test_unchanged_page_is_not_modified(client):
+    response = client.get('/artists')
+    etag = response.get_etag()[0]
+    assert client.get('/artists', headers={'If-None-Match': '"{}"'.format(etag)}).status_code == 304
+    response = client.get('/artists', headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_write_within_the_same_second_moves_the_etag(app, client):
+    response = client.get('/artists')
+    last_modified, etag = response.headers['Last-Modified'], response.get_etag()[0]
+    with app.app_context():
+        set_updated_at(WRITTEN.replace(microsecond=500000))
+    response = client.get('/artists', headers={'If-None-Match': '"{}"'.format(etag),
+                                               'If-Modified-Since': last_modified})
+    # the HTTP date alone would have said 304
+    assert response.headers['Last-Modified'] == last_modified
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+def test_newer_write_is_modified(app, client):
+    last_modified = client.get('/artists').headers['Last-Modified']
+    with app.app_context():
+        set_updated_at(datetime(2030, 1, 1, 12, 0, 5))
+    response = client.get('/artists', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+    assert response.headers['Last-Modified'] == http_date(datetime(2030, 1, 1, 12, 0, 5))
+
+
+def test_pending_flash_is_never_cached(client):
+    etag = client.get('/artists').get_etag()[0]
+    with client.session_transaction() as session:
+        session['_flashes'] = [('message', 'Artist The Band was successfully listed!')]
+    response = client.get('/artists', headers={'If-None-Match': '"{}"'.format(etag)})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert 'successfully listed' in response.get_data(as_text=True)
+    assert client.get('/artists', headers={'If-None-Match': '"{}"'.format(etag)}).status_code == 304
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+import pytest
+from formatting import DatetimeFormatter, format_datetime_uncached
+
+VALUES = [datetime(2030, 6, 1, 20, 0) + timedelta(days=day, minutes=day * 37) for day in range(0, 400, 13)]
+
+
+@pytest.mark.parametrize('format', ['full', 'medium', 'yyyy-MM-dd HH:mm'])
+def test_matches_the_uncached_filter(format):
+    formatter = DatetimeFormatter()
+    for value in VALUES:
+        expected = format_datetime_uncached(value, format)
+        assert formatter.format(value, format) == expected
+        # a memoized result, and a string as the templates sometimes pass
+        assert formatter.format(value, format) == expected
+        assert formatter.format(str(value), format) == expected
+
+
+def test_named_formats():
+    formatter = DatetimeFormatter('en_US')
+    value = datetime(2030, 6, 1, 20, 5)
+    assert formatter.format(value, 'full') == 'Saturday June, 1, 2030 at 8:05PM'
+    assert formatter.format(value) == 'Sat 06, 01, 2030 8:05PM'
+
+
+def test_locale_is_part_of_the_key():
+    formatter = DatetimeFormatter('en_US')
+    value = datetime(2030, 6, 1, 20, 5)
+    assert formatter.format(value, 'full', 'de_DE') == 'Samstag Juni, 1, 2030 at 8:05PM'
+    assert formatter.format(value, 'full') == 'Saturday June, 1, 2030 at 8:05PM'
+
+
+def test_results_are_bounded():
+    formatter = DatetimeFormatter('en_US', maxsize=4)
+    for value in VALUES:
+        formatter.format(value)
+    assert len(formatter._results) == 4
+    assert formatter.format(VALUES[0]) == format_datetime_uncached(VALUES[0])
+
+
+def test_template_filter(app):
+    with app.app_context():
+        rendered = app.jinja_env.from_string('{{ value|datetime("full") }}').render(value=datetime(2030, 6, 1, 20, 5))
+    assert rendered == DatetimeFormatter(app.config['DATETIME_LOCALE']).format(datetime(2030, 6, 1, 20, 5), 'full')
@@ -0,0 +1,57 @@
+import pytest
+from jinja2 import Environment
+from cache import LocalCache, PageCache
+from fragments import FragmentCacheExtension
+
+
+class RecordingCache(LocalCache):
+    def __init__(self):
+        super(RecordingCache, self).__init__()
+        self.ttls = {}
+
+    def set(self, key, value, ttl=None):
+        self.ttls[key] = ttl
+        super(RecordingCache, self).set(key, value, ttl)
+
+
+@pytest.fixture
+def env():
+    env = Environment(extensions=[FragmentCacheExtension], autoescape=True)
+    env.fragment_cache = PageCache(RecordingCache())
+    return env
+
+
+TILE = "{% cache 'tile', show.id, show.version %}<b>{{ show.name }}</b>{% endcache %}"
+
+
+def test_body_is_cached_under_its_key_parts(env):
+    template = env.from_string(TILE)
+    assert template.render(show={'id': 1, 'version': 1, 'name': 'Jazz'}) == '<b>Jazz</b>'
+    # same key, so the cached body even though the data moved on
+    assert template.render(show={'id': 1, 'version': 1, 'name': 'Folk'}) == '<b>Jazz</b>'
+    assert template.render(show={'id': 1, 'version': 2, 'name': 'Folk'}) == '<b>Folk</b>'
+    assert template.render(show={'id': 2, 'version': 1, 'name': 'Rock'}) == '<b>Rock</b>'
+    assert set(env.fragment_cache.backend.ttls) == {'fragment:tile:1:1', 'fragment:tile:1:2', 'fragment:tile:2:1'}
+    assert env.fragment_cache.stats()['hits'] == 1
+
+
+def test_cached_body_is_not_escaped_again(env):
+    template = env.from_string(TILE)
+    show = {'id': 1, 'version': 1, 'name': '<i>&</i>'}
+    first = template.render(show=show)
+    assert first == '<b>&lt;i&gt;&amp;&lt;/i&gt;</b>'
+    assert template.render(show=show) == first
+
+
+def test_ttl_is_passed_to_the_backend(env):
+    template = env.from_string("{% cache 'tile', id, ttl=60 * 10 %}{{ id }}{% endcache %}"
+                               "{% cache 'plain', id %}{{ id }}{% endcache %}")
+    assert template.render(id=3) == '33'
+    assert env.fragment_cache.backend.ttls == {'fragment:tile:3': 600, 'fragment:plain:3': None}
+
+
+def test_renders_every_time_without_a_cache():
+    env = Environment(extensions=[FragmentCacheExtension])
+    template = env.from_string(TILE)
+    assert template.render(show={'id': 1, 'version': 1, 'name': 'Jazz'}) == '<b>Jazz</b>'
+    assert template.render(show={'id': 1, 'version': 1, 'name': 'Folk'}) == '<b>Folk</b>'
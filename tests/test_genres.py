@@ -0,0 +1,67 @@
+from extensions import db
+from models import Artist, Genre, artist_genres, parse_genres, link_artist_genres, set_artist_genres
+
+ARTIST_FORM = {'name': 'The Band', 'city': 'Austin', 'state': 'TX', 'phone': '', 'website': '',
+               'facebook_link': '', 'image_link': ''}
+
+
+def test_parse_genres_normalizes_every_stored_shape():
+    assert parse_genres(['Jazz', ' Folk ', '', 'Jazz']) == ['Jazz', 'Folk']
+    assert parse_genres('Jazz, Folk,,Rock') == ['Jazz', 'Folk', 'Rock']
+    # the legacy Postgres array literal
+    assert parse_genres('{Jazz,"Hip-Hop"}') == ['Jazz', 'Hip-Hop']
+    assert parse_genres(None) == []
+    assert parse_genres('') == []
+
+
+def counts():
+    return dict(db.session.query(Genre.name, Genre.artist_count))
+
+
+def linked(artist_id):
+    return sorted(name for name, in db.session.query(Genre.name).join(artist_genres)
+                  .filter(artist_genres.c.artist_id == artist_id))
+
+
+def add_artist(name):
+    artist = Artist(name=name)
+    db.session.add(artist)
+    db.session.flush()
+    return artist.id
+
+
+def test_link_artist_genres_creates_genres_and_counts_artists(app):
+    with app.app_context():
+        first, second = add_artist('First'), add_artist('Second')
+        link_artist_genres([(first, 'Jazz'), (first, 'Folk'), (second, 'Jazz')])
+        db.session.commit()
+        assert counts() == {'Jazz': 2, 'Folk': 1}
+        assert linked(first) == ['Folk', 'Jazz']
+        link_artist_genres([])
+        assert counts() == {'Jazz': 2, 'Folk': 1}
+
+
+def test_set_artist_genres_moves_only_the_changed_counts(app):
+    with app.app_context():
+        first, second = add_artist('First'), add_artist('Second')
+        link_artist_genres([(first, 'Jazz'), (first, 'Folk'), (second, 'Jazz')])
+        set_artist_genres(first, ['Jazz', 'Rock'])
+        db.session.commit()
+        assert counts() == {'Jazz': 2, 'Folk': 0, 'Rock': 1}
+        assert linked(first) == ['Jazz', 'Rock']
+        set_artist_genres(first, [])
+        db.session.commit()
+        assert counts() == {'Jazz': 1, 'Folk': 0, 'Rock': 0}
+        assert linked(second) == ['Jazz']
+
+
+def test_artist_forms_keep_the_counts(app):
+    client = app.test_client()
+    client.post('/artists/create', data=dict(ARTIST_FORM, genres=['Jazz', 'Folk', 'Jazz']))
+    with app.app_context():
+        artist_id = db.session.query(Artist.id).scalar()
+        assert counts() == {'Jazz': 1, 'Folk': 1}
+    client.post('/artists/{}/edit'.format(artist_id), data=dict(ARTIST_FORM, genres=['Folk', 'Blues']))
+    with app.app_context():
+        assert counts() == {'Jazz': 0, 'Folk': 1, 'Blues': 1}
+        assert db.session.query(Artist.genres).scalar() == 'Folk,Blues'
@@ -0,0 +1,48 @@
+import random
+from extensions import db
+from geo import CELL_COLUMNS, CELL_DEGREES, geo_cell, haversine, nearby, nearby_naive
+from models import Venue
+
+
+def test_geo_cell_edges():
+    assert geo_cell(0, 0) == geo_cell(CELL_DEGREES / 2, CELL_DEGREES / 2)
+    assert geo_cell(0, CELL_DEGREES) == geo_cell(0, 0) + 1
+    assert geo_cell(CELL_DEGREES, 0) == geo_cell(0, 0) + CELL_COLUMNS
+    assert geo_cell(0, -1e-9) == geo_cell(0, 0) - 1
+    # 180 is the same meridian as -180
+    assert geo_cell(10, 180) == geo_cell(10, -180)
+
+
+def add_venues(points):
+    db.session.add_all([Venue(id=venue_id, name='Venue {}'.format(venue_id), latitude=lat, longitude=lon,
+                              geo_cell=geo_cell(lat, lon)) for venue_id, (lat, lon) in enumerate(points, 1)])
+    db.session.commit()
+
+
+def test_nearby_radius_is_inclusive_and_exact(app):
+    with app.app_context():
+        # due north of the centre in steps of about 1.7 miles
+        add_venues([(30.0 + step * 0.025, -97.74) for step in range(10)])
+        radius = haversine(30.0, -97.74, 30.1, -97.74)
+        found = nearby(db.session, Venue, 30.0, -97.74, radius)
+        assert [venue['id'] for venue in found] == [1, 2, 3, 4, 5]
+        assert found[0]['distance'] == 0
+        assert nearby(db.session, Venue, 30.0, -97.74, radius, limit=2) == found[:2]
+
+
+def test_nearby_matches_the_naive_scan_across_cell_edges(app):
+    generator = random.Random(3)
+    # venues clustered on a cell corner, near the antimeridian and near a pole
+    centres = [(30.0, -97.75), (10.0, 179.95), (-10.0, -179.9), (89.9, 20.0)]
+    points = [(lat + generator.uniform(-0.6, 0.6), lon + generator.uniform(-0.6, 0.6))
+              for lat, lon in centres for n in range(60)]
+    points = [(max(min(lat, 90.0), -90.0), (lon + 180) % 360 - 180) for lat, lon in points]
+    with app.app_context():
+        add_venues(points)
+        for lat, lon in centres:
+            for radius in (1, 5, 20, 60, 500):
+                expected = nearby_naive(db.session, Venue, lat, lon, radius, limit=1000)
+                assert expected or radius < 20
+                assert nearby(db.session, Venue, lat, lon, radius, limit=1000) == expected
+        # the antimeridian clusters see each other
+        assert len(nearby(db.session, Venue, 0.0, 180.0, 1000, limit=1000)) == 120
@@ -0,0 +1,74 @@
+import io
+import json
+from datetime import datetime
+import pytest
+from extensions import db
+from importer import BulkLoader, Rejected, venue_row, artist_row
+from models import Venue, Artist, Show, Genre, link_artist_genres
+
+
+def test_venue_row_validation():
+    row = venue_row({'name': ' The Hall ', 'city': 'Austin', 'latitude': '30.27', 'longitude': '-97.74',
+                     'seeking_talent': 'yes'})
+    assert row['name'] == 'The Hall'
+    assert row['seeking_talent'] is True
+    assert row['geo_cell'] is not None
+    # unparseable coordinates are left for the geocoder
+    assert venue_row({'name': 'Hall', 'latitude': 'north'})['latitude'] is None
+    with pytest.raises(Rejected, match='missing name'):
+        venue_row({'name': '  '})
+    with pytest.raises(Rejected, match='coordinates out of range'):
+        venue_row({'name': 'Hall', 'latitude': '91', 'longitude': '0'})
+
+
+def test_artist_row_stores_each_genre_once():
+    assert artist_row({'name': 'Band', 'genres': ['Jazz', 'Folk', 'Jazz']})['genres'] == 'Jazz,Folk'
+    assert artist_row({'name': 'Band', 'genres': ''})['genres'] is None
+    with pytest.raises(Rejected, match='missing name'):
+        artist_row({'genres': 'Jazz'})
+
+
+def write_jsonl(path, records):
+    # None stands for a line that is not a JSON object
+    path.write_text(''.join((json.dumps(record) if record is not None else '[1, 2]') + '\n' for record in records))
+    return str(path)
+
+
+def test_bulk_loader_rejects_bad_rows_and_keeps_the_rest(app, tmp_path):
+    venues = write_jsonl(tmp_path / 'venues.jsonl', [
+        {'id': 'v1', 'name': 'The Hall', 'city': 'Austin', 'state': 'TX'},
+        {'id': 'v2', 'city': 'Austin'},
+        None,
+    ])
+    artists = write_jsonl(tmp_path / 'artists.jsonl', [
+        {'id': 'a1', 'name': 'The Band', 'genres': 'Jazz,Folk'},
+    ])
+    shows = tmp_path / 'shows.csv'
+    shows.write_text('venue_id,artist_id,start_time,duration\n'
+                     'v1,a1,2030-06-01T20:00:00,\n'
+                     'v1,a1,2020-06-01T20:00:00,90\n'
+                     'v2,a1,2030-06-02T20:00:00,90\n'
+                     'v1,a1,not a date,90\n'
+                     'v1,a1,2030-06-03T20:00:00,721\n'
+                     'v1,a1,2030-06-04T20:00:00,0\n')
+    rejects = io.StringIO()
+    with app.app_context():
+        loader = BulkLoader(db, (Venue, Artist, Show), datetime(2025, 1, 1), 120, 720, batch_size=2,
+                            rejects=rejects, log=lambda line: None, link_genres=link_artist_genres)
+        assert loader.run(venues=venues, artists=artists, shows=str(shows)) == 6
+        assert db.session.query(Venue.name).all() == [('The Hall',)]
+        assert sorted(db.session.query(Genre.name, Genre.artist_count)) == [('Folk', 1), ('Jazz', 1)]
+        assert sorted(db.session.query(Show.start_time, Show.duration)) == [
+            (datetime(2020, 6, 1, 20, 0), 90), (datetime(2030, 6, 1, 20, 0), 120)]
+        assert db.session.query(Venue.upcoming_shows_count, Venue.past_shows_count).one() == (1, 1)
+        assert db.session.query(Artist.upcoming_shows_count, Artist.past_shows_count).one() == (1, 1)
+    reasons = [(reject['file'].rsplit('/', 1)[1], reject['line'], reject['reason'])
+               for reject in map(json.loads, rejects.getvalue().splitlines())]
+    assert reasons == [
+        ('venues.jsonl', 2, 'missing name'),
+        ('venues.jsonl', 3, 'unparseable line'),
+        ('shows.csv', 4, 'unknown venue_id v2'),
+        ('shows.csv', 5, 'bad start_time not a date'),
+        ('shows.csv', 6, 'bad duration 721'),
+        ('shows.csv', 7, 'bad duration 0'),
+    ]
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+import pytest
+from extensions import db
+from models import Venue, Artist, Show, ShowArchive
+from views.helpers import encode_cursor, decode_cursor
+
+PAGE_SIZE = 3
+
+
+def test_cursor_round_trip():
+    start_time = datetime(2020, 6, 1, 20, 30, 0, 250)
+    assert decode_cursor(encode_cursor(start_time, 42)) == (start_time, 42)
+    assert decode_cursor(encode_cursor(datetime(2020, 6, 1), 7)) == (datetime(2020, 6, 1), 7)
+    with pytest.raises(ValueError):
+        decode_cursor('yesterday_1')
+
+
+def add_shows(archived, hot):
+    venue = Venue(name='The Hall', city='Austin', state='TX')
+    artist = Artist(name='The Band', city='Austin', state='TX')
+    db.session.add_all([venue, artist])
+    db.session.flush()
+    shows = [(ShowArchive, datetime(2020, 1, 1, 20) + timedelta(days=day)) for day in range(archived)]
+    shows += [(Show, datetime(2024, 1, 1, 20) + timedelta(days=day)) for day in range(hot)]
+    # upcoming, so never on a past shows page
+    shows.append((Show, datetime(2040, 1, 1, 20)))
+    for show_id, (model, start_time) in enumerate(shows, 1):
+        db.session.add(model(id=show_id, venue_id=venue.id, artist_id=artist.id, start_time=start_time, duration=120))
+    db.session.commit()
+    return venue.id
+
+
+def walk(client, venue_id):
+    pages = []
+    url = '/api/v1/venues/{}/past_shows'.format(venue_id)
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([show['start_time'] for show in body['data']])
+        url = body['next']
+    return pages
+
+
+@pytest.mark.parametrize('archived, hot, sizes', [
+    (4, 3, [3, 3, 1]),
+    # a full last page has no next link
+    (2, 4, [3, 3]),
+    (0, 2, [2]),
+    (5, 0, [3, 2]),
+    (0, 0, [0]),
+])
+def test_pages_run_through_the_archive_then_the_hot_shows(app, archived, hot, sizes):
+    app.config['SHOWS_PER_PAGE'] = PAGE_SIZE
+    with app.app_context():
+        venue_id = add_shows(archived, hot)
+    pages = walk(app.test_client(), venue_id)
+    assert [len(page) for page in pages] == sizes
+    start_times = [start_time for page in pages for start_time in page]
+    assert start_times == sorted(start_times)
+    assert len(start_times) == archived + hot
+
+
+def test_bad_cursor_is_a_client_error(app):
+    with app.app_context():
+        venue_id = add_shows(1, 1)
+    response = app.test_client().get('/api/v1/venues/{}/past_shows?cursor=yesterday'.format(venue_id))
+    assert response.status_code == 400
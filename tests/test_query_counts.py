@@ -0,0 +1,50 @@
+import os
+import pytest
+from app import create_app
+from cache import NullCache
+from explain import capture_queries
+from extensions import db, page_cache
+from models import Show
+from seed import seed_database
+
+# SELECTs per request with the page cache off: a change here is either an
+# N+1 creeping in or a deliberate change to the query plan of the page.
+# /venues: the stale area check, max(refreshed_at), the area rows.
+# /artists: the table version, the artist rows.
+# /venues/<id>: the venue version, the venue with its upcoming shows.
+STATEMENTS = {
+    '/venues': 3,
+    '/artists': 2,
+    '/venues/{venue_id}': 2,
+}
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    app = create_app()
+    # TEST_DATABASE_URL points the test at a scratch Postgres database
+    database = os.getenv('TEST_DATABASE_URL') or 'sqlite:///{}'.format(tmp_path_factory.mktemp('db') / 'test.db')
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=database, SQLALCHEMY_BINDS={})
+    with app.app_context():
+        db.create_all()
+        seed_database(20, 20, 100, seed=1, log=lambda line: None)
+    backend, page_cache.backend = page_cache.backend, NullCache()
+    try:
+        yield app
+    finally:
+        page_cache.backend = backend
+        with app.app_context():
+            db.drop_all()
+
+
+@pytest.mark.parametrize('path', sorted(STATEMENTS))
+def test_statement_count(app, path):
+    with app.app_context():
+        venue_id = db.session.query(Show.venue_id).order_by(Show.id).limit(1).scalar()
+        engine = db.engine
+    client = app.test_client()
+    with capture_queries(engine) as queries:
+        # buffered so streamed pages run their queries to the last row
+        response = client.get(path.format(venue_id=venue_id), buffered=True)
+    assert response.status_code == 200
+    assert len(queries) == STATEMENTS[path], [statement for statement, parameters in queries]
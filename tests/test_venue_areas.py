@@ -0,0 +1,93 @@
+import json
+from datetime import datetime, timedelta
+import models
+from extensions import db
+from models import Venue, VenueArea, mark_area_stale, stale_venue_areas, refresh_venue_area
+
+VENUE_FORM = {'city': 'Austin', 'state': 'TX', 'address': '1 Main St', 'phone': '', 'website': '',
+              'image_link': '', 'facebook_link': ''}
+
+
+def area(city='Austin', state='TX'):
+    return db.session.query(VenueArea).filter(VenueArea.city == city, VenueArea.state == state).one()
+
+
+def add_venue(name, city='Austin', state='TX'):
+    db.session.add(Venue(name=name, city=city, state=state))
+    mark_area_stale(city, state)
+    db.session.commit()
+
+
+def test_first_write_marks_the_area_stale_once(app):
+    with app.app_context():
+        add_venue('The Hall')
+        first = area().stale_since
+        assert first is not None
+        add_venue('The Annex')
+        assert area().stale_since == first
+        # a missing city or state is keyed as ''
+        add_venue('Nowhere', city=None, state=None)
+        assert area('', '').stale_since is not None
+        assert db.session.query(VenueArea).count() == 2
+
+
+def test_only_areas_past_the_staleness_limit_are_due(app):
+    with app.app_context():
+        add_venue('The Hall')
+        add_venue('The Pit', city='Denver', state='CO')
+        area('Denver', 'CO').stale_since = datetime.utcnow() - timedelta(seconds=60)
+        db.session.commit()
+        assert stale_venue_areas(30) == [area('Denver', 'CO').id]
+        assert sorted(stale_venue_areas(0)) == sorted([area().id, area('Denver', 'CO').id])
+
+
+def test_refresh_rebuilds_the_rollup_and_clears_the_mark(app):
+    with app.app_context():
+        add_venue('The Hall')
+        add_venue('The Annex')
+        db.session.query(Venue).filter(Venue.name == 'The Annex').update({'upcoming_shows_count': 3})
+        area_id = area().id
+        assert refresh_venue_area(area_id) is True
+        row = area()
+        assert row.stale_since is None
+        assert row.venue_count == 2
+        assert row.upcoming_shows_count == 3
+        assert [venue['name'] for venue in json.loads(row.venues)] == ['The Hall', 'The Annex']
+        # nothing to do for a current area
+        assert refresh_venue_area(area_id) is False
+
+
+def test_superseded_refresh_does_not_write(app, monkeypatch):
+    with app.app_context():
+        add_venue('The Hall')
+        area_id = area().id
+        refresh_venue_area(area_id)
+        add_venue('The Annex')
+        in_area = models.in_area
+
+        def claimed_by_another_refresh(city, state):
+            # a write and a second refresh land after our claim
+            db.session.query(VenueArea).filter(VenueArea.id == area_id).update({'claim': 'newer'})
+            db.session.commit()
+            return in_area(city, state)
+
+        monkeypatch.setattr(models, 'in_area', claimed_by_another_refresh)
+        assert refresh_venue_area(area_id) is True
+        row = area()
+        assert row.claim == 'newer'
+        assert row.venue_count == 1
+
+
+def test_venues_page_refreshes_areas_past_the_limit(app):
+    app.config['VENUE_AREAS_MAX_STALENESS'] = 0
+    client = app.test_client()
+    client.post('/venues/create', data=dict(VENUE_FORM, name='The Hall'))
+    assert 'The Hall' in client.get('/venues').get_data(as_text=True)
+    with app.app_context():
+        assert area().stale_since is None
+    app.config['VENUE_AREAS_MAX_STALENESS'] = 3600
+    client.post('/venues/create', data=dict(VENUE_FORM, name='The Annex'))
+    # within the limit the page serves the rollup it has
+    assert 'The Annex' not in client.get('/venues').get_data(as_text=True)
+    with app.app_context():
+        assert area().stale_since is not None
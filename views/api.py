@@ -0,0 +1,112 @@
+from flask import Blueprint, request, url_for, abort, current_app
+from extensions import db
+from models import Venue, Artist, Show, Genre, artist_genres
+from database import use_replica
+from search import get_search_backend
+from api import API_PREFIX, conditional_json
+from views.helpers import table_versions, venue_version, artist_version
+from views.venues import load_venue, load_venue_past_shows
+from views.artists import load_artist, load_artist_past_shows
+from views.shows import load_shows_page
+
+bp = Blueprint('api', __name__, url_prefix=API_PREFIX)
+
+#  API
+#  ----------------------------------------------------------------
+# JSON mirrors of the pages for the mobile client. Every response carries
+# a strong ETag derived from row versions; a matching If-None-Match gets a
+# 304 after just the version lookup.
+
+def api_page(query, model, endpoint, columns, **args):
+  # keyset pagination on id: ?after=<last id>
+  page_size = current_app.config['API_PAGE_SIZE']
+  try:
+    after = int(request.args.get('after', 0))
+    limit = min(int(request.args.get('limit', page_size)), page_size)
+  except ValueError:
+    abort(400)
+  if limit < 1:
+    abort(400)
+  rows = query.filter(model.id > after).order_by(model.id).limit(limit + 1).all()
+  data = [dict(zip(columns, row)) for row in rows[:limit]]
+  next_url = None
+  if len(rows) > limit:
+    next_url = url_for(endpoint, after=data[-1]['id'], limit=limit, **args)
+  return {'data': data, 'next': next_url}
+
+API_VENUE_COLUMNS = (Venue.id, Venue.name, Venue.city, Venue.state, Venue.latitude, Venue.longitude,
+  Venue.upcoming_shows_count, Venue.past_shows_count)
+API_ARTIST_COLUMNS = (Artist.id, Artist.name, Artist.city, Artist.state, Artist.genres,
+  Artist.upcoming_shows_count, Artist.past_shows_count)
+
+@bp.route('/venues')
+@use_replica
+def api_venues():
+  return conditional_json(table_versions(Venue), lambda: api_page(
+    db.session.query(*API_VENUE_COLUMNS), Venue, 'api.api_venues', [column.key for column in API_VENUE_COLUMNS]))
+
+def past_shows_json(shows, next_url):
+  return {'data': shows, 'next': next_url}
+
+@bp.route('/venues/<int:venue_id>')
+@use_replica
+def api_venue(venue_id):
+  # the first page of past shows inline; past_shows.next pages on through
+  # /venues/<id>/past_shows
+  return conditional_json(venue_version(venue_id), lambda: dict(load_venue(venue_id),
+    past_shows=past_shows_json(*load_venue_past_shows(venue_id, endpoint='api.api_venue_past_shows'))))
+
+@bp.route('/venues/<int:venue_id>/past_shows')
+@use_replica
+def api_venue_past_shows(venue_id):
+  # the cursor is part of the URL, and so of the ETag's scope
+  return conditional_json(venue_version(venue_id), lambda: past_shows_json(*load_venue_past_shows(venue_id,
+    request.args.get('cursor'), endpoint='api.api_venue_past_shows')))
+
+@bp.route('/venues/search')
+@use_replica
+def api_search_venues():
+  term = request.args.get('q', '')
+  return conditional_json(table_versions(Venue),
+    lambda: {'data': get_search_backend(db.session).search(Venue, term)})
+
+@bp.route('/artists')
+@use_replica
+def api_artists():
+  genre = request.args.get('genre')
+  query = db.session.query(*API_ARTIST_COLUMNS)
+  if genre:
+    query = query.join(artist_genres, artist_genres.c.artist_id == Artist.id) \
+      .join(Genre, Genre.id == artist_genres.c.genre_id).filter(Genre.name == genre)
+  args = {'genre': genre} if genre else {}
+  return conditional_json(table_versions(Artist), lambda: api_page(
+    query, Artist, 'api.api_artists', [column.key for column in API_ARTIST_COLUMNS], **args))
+
+@bp.route('/artists/<int:artist_id>')
+@use_replica
+def api_artist(artist_id):
+  return conditional_json(artist_version(artist_id), lambda: dict(load_artist(artist_id),
+    past_shows=past_shows_json(*load_artist_past_shows(artist_id, endpoint='api.api_artist_past_shows'))))
+
+@bp.route('/artists/<int:artist_id>/past_shows')
+@use_replica
+def api_artist_past_shows(artist_id):
+  return conditional_json(artist_version(artist_id), lambda: past_shows_json(*load_artist_past_shows(artist_id,
+    request.args.get('cursor'), endpoint='api.api_artist_past_shows')))
+
+@bp.route('/artists/search')
+@use_replica
+def api_search_artists():
+  term = request.args.get('q', '')
+  return conditional_json(table_versions(Artist),
+    lambda: {'data': get_search_backend(db.session).search(Artist, term)})
+
+@bp.route('/shows')
+@use_replica
+def api_shows():
+  def build():
+    data, next_url = load_shows_page('api.api_shows')
+    return {'data': [{key: show[key] for key in ('id', 'start_time', 'venue_id', 'venue_name', 'artist_id',
+      'artist_name', 'artist_image_link')} for show in data], 'next': next_url}
+  # the page's cursor and filters are part of the URL, and so of the ETag's scope
+  return conditional_json(table_versions(Show, Venue, Artist), build)
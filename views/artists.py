@@ -0,0 +1,188 @@
+from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+from sqlalchemy import and_
+from extensions import db, page_cache
+from models import Venue, Artist, Show, Genre, artist_genres, request_now, parse_genres, link_artist_genres, \
+  set_artist_genres, touch_show_partners
+from database import use_replica
+from forms import ArtistForm
+from search import get_search_backend
+from views.helpers import conditional_page, page_key, stream_query, stream_template, tables_last_modified, \
+  artist_last_modified, past_shows_page
+from views import autocomplete
+
+bp = Blueprint('artists', __name__)
+
+#  Artists
+#  ----------------------------------------------------------------
+@bp.route('/artists')
+@use_replica
+@conditional_page(tables_last_modified(Artist))
+def artists():
+  genre = request.args.get('genre')
+  return stream_template('pages/artists.html', artists=artist_rows(genre), genre=genre)
+
+def artist_rows(genre=None):
+  artist_query = db.session.query(Artist.id, Artist.name)
+  if genre:
+    # resolved through the (genre_id, artist_id) index, not a LIKE on Artist.genres
+    artist_query = artist_query.join(artist_genres, artist_genres.c.artist_id == Artist.id) \
+      .join(Genre, Genre.id == artist_genres.c.genre_id).filter(Genre.name == genre)
+  return stream_query(artist_query.order_by(Artist.id))
+
+@bp.route('/genres')
+@use_replica
+@conditional_page(tables_last_modified(Genre))
+def genres():
+  data = page_cache.get_or_set(page_key('genres'), lambda: [{'name': name, 'artist_count': count}
+    for name, count in db.session.query(Genre.name, Genre.artist_count)
+      .order_by(Genre.artist_count.desc(), Genre.name)])
+  return render_template('pages/genres.html', genres=data)
+
+@bp.route('/genres/<name>')
+@use_replica
+@conditional_page(tables_last_modified(Artist))
+def show_genre(name):
+  genre = Genre.query.filter_by(name=name).first_or_404()
+  return stream_template('pages/artists.html', artists=artist_rows(name), genre=genre.name)
+
+@bp.route('/artists/search', methods=['POST'])
+def search_artists():
+  search_term = request.form.get('search_term', '')
+  data = get_search_backend(db.session).search(Artist, search_term)
+  response = {"count": len(data), "data": data}
+  return render_template('pages/search_artists.html', results=response, search_term=search_term)
+
+@bp.route('/artists/<int:artist_id>')
+@use_replica
+@conditional_page(lambda artist_id: artist_last_modified(artist_id))
+def show_artist(artist_id):
+  artist = page_cache.get_or_set(page_key('artist:{}'.format(artist_id)), lambda: load_artist(artist_id))
+  return render_template('pages/show_artist.html', artist=artist)
+
+def load_artist(artist_id):
+  # upcoming shows only; past shows are loaded when the page asks for them
+  rows = db.session.query(Artist, Show.start_time, Venue.id, Venue.name, Venue.image_link) \
+    .outerjoin(Show, and_(Show.artist_id == Artist.id, Show.start_time >= request_now())) \
+    .outerjoin(Venue, Venue.id == Show.venue_id) \
+    .filter(Artist.id == artist_id) \
+    .order_by(Show.start_time, Show.id).all()
+  if not rows:
+    abort(404)
+
+  artist = rows[0][0]
+  artist_obj = {'id':artist.id,'name' : artist.name,'city': artist.city,'state':artist.state,'website':artist.website,
+  'phone': artist.phone,'genres':parse_genres(artist.genres),'facebook_link':artist.facebook_link,
+  'image_link':artist.image_link, 'seeking_venue': artist.seeking_venue,'seeking_description':artist.venue_description}
+
+  upcoming_shows = []
+  for _, start_time, venue_id, venue_name, venue_image_link in rows:
+    if start_time is None:
+      continue
+    upcoming_shows.append({'venue_id':venue_id,'venue_name':venue_name,'venue_image_link':venue_image_link,
+    'start_time': start_time})
+
+  artist_obj['upcoming_shows'] = upcoming_shows
+  artist_obj['upcoming_shows_count'] = len(upcoming_shows)
+  # as for venues: every show not upcoming any more is past
+  artist_obj['past_shows_count'] = max(artist.upcoming_shows_count + artist.past_shows_count - len(upcoming_shows),
+    0)
+  return artist_obj
+
+@bp.route('/artists/<int:artist_id>/past_shows')
+@use_replica
+@conditional_page(lambda artist_id: artist_last_modified(artist_id))
+def artist_past_shows(artist_id):
+  cursor = request.args.get('cursor')
+  shows, next_url = page_cache.get_or_set(page_key('artist-past:{}:{}'.format(artist_id, cursor or '')),
+    lambda: load_artist_past_shows(artist_id, cursor))
+  return render_template('pages/artist_past_shows.html', shows=shows, next_url=next_url)
+
+def load_artist_past_shows(artist_id, cursor=None, endpoint='artists.artist_past_shows'):
+  # as for venues: a page of past shows and the URL of the next one
+  rows, next_url = past_shows_page('artist_id', artist_id, Venue, 'venue_id', cursor, endpoint, artist_id=artist_id)
+  shows = [{'venue_id':venue_id,'venue_name':venue_name,'venue_image_link':venue_image_link,
+    'start_time': start_time} for _, start_time, venue_id, venue_name, venue_image_link in rows]
+  return shows, next_url
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  artist = Artist.query.filter_by(id = artist_id).one()
+  form = ArtistForm(obj=artist)
+  form.genres.data = parse_genres(artist.genres)
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  try:
+    if request.form.get('seeking_venue') == 'y':
+      seeking_venue = True
+      venue_description = request.form['seeking_description']
+    else:
+      seeking_venue = False
+      venue_description = None
+    genre_names = parse_genres(request.form.getlist('genres'))
+    new_artist = dict(name=request.form['name'],city = request.form['city'],
+    state= request.form['state'], genres = ','.join(genre_names),
+    facebook_link = request.form['facebook_link'],image_link=request.form['image_link'],
+    website = request.form['website'], seeking_venue= seeking_venue,
+    venue_description = venue_description)
+    db.session.query(Artist).filter(Artist.id==artist_id).update(new_artist)
+    touch_show_partners(Artist, artist_id)
+    set_artist_genres(artist_id, genre_names)
+    db.session.commit()
+    autocomplete.names.update('artist', artist_id, new_artist['name'])
+    flash('Artist was edited to be ' + request.form['name'] + ' succesfully.')
+
+  except Exception as e:
+    print(e)
+    flash('Artist was not edited succesfully.')
+    db.session.rollback()
+  finally:
+    db.session.close()
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  form = ArtistForm(request.form)
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  error = False
+  data = {}
+  try:
+    seeking_venue = False
+    venue_description = ''
+
+    if 'seeking_venue' in request.form:
+      seeking_venue = True
+    if 'venue_description' in request.form:
+      venue_description = request.form['venue_description']
+
+    genre_names = parse_genres(request.form.getlist('genres'))
+    artist = Artist(name=request.form['name'],genres=','.join(genre_names),
+    city=request.form['city'],state=request.form['state'],phone=request.form['phone'],website=request.form['website'],
+    facebook_link=request.form['facebook_link'],seeking_venue=seeking_venue,
+    venue_description=venue_description,image_link=request.form['image_link'])
+    db.session.add(artist)
+    db.session.flush()
+    artist_id = artist.id
+    link_artist_genres([(artist_id, name) for name in genre_names])
+    db.session.commit()
+    autocomplete.names.update('artist', artist_id, request.form['name'], 0)
+    flash('Artist ' + request.form['name'] + ' was successfully listed!')
+
+  except Exception as e:
+    error = True
+    print(e)
+    db.session.rollback()
+    flash('An error occurred. Artist ' + request.form['name'] + ' could not be listed.')
+
+  finally:
+    db.session.close()
+    return render_template('pages/home.html')
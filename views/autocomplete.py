@@ -0,0 +1,48 @@
+from flask import Blueprint, request, abort, jsonify, current_app
+from extensions import db, metrics
+from models import Venue, Artist
+from database import use_replica
+from autocomplete import Autocomplete
+
+bp = Blueprint('autocomplete', __name__)
+
+# one index per worker process, built after the fork (gunicorn.conf.py
+# post_worker_init) or by the first request
+names = Autocomplete({'venue': Venue, 'artist': Artist})
+
+metrics.gauge('jamspot_autocomplete_names', 'Names in the autocomplete index.',
+  lambda: [({'type': kind}, stats['names']) for kind, stats in sorted(names.stats().items())])
+metrics.gauge('jamspot_autocomplete_bytes', 'Memory held by the autocomplete index.',
+  lambda: [({'type': kind}, stats['bytes']) for kind, stats in sorted(names.stats().items())])
+
+@bp.record_once
+def configure(state):
+  names.poll_seconds = state.app.config['AUTOCOMPLETE_POLL_SECONDS']
+  names.overlay_limit = state.app.config['AUTOCOMPLETE_OVERLAY_LIMIT']
+
+#  Autocomplete
+#  ----------------------------------------------------------------
+
+@bp.route('/autocomplete')
+@use_replica
+def autocomplete():
+  # ?q=<prefix>&type=venue|artist[&limit=]: names starting with q, most
+  # upcoming shows first
+  kind = request.args.get('type', 'venue')
+  if kind not in names.models:
+    abort(400)
+  max_limit = current_app.config['AUTOCOMPLETE_LIMIT']
+  try:
+    limit = min(int(request.args.get('limit', max_limit)), max_limit)
+  except ValueError:
+    abort(400)
+  if limit < 1:
+    abort(400)
+  names.refresh(db.session)
+  data = [{'id': entry_id, 'name': name, 'num_upcoming_shows': rank}
+    for entry_id, name, rank in names.search(kind, request.args.get('q', ''), limit)]
+  return jsonify({'count': len(data), 'data': data})
+
+@bp.route('/autocomplete/stats')
+def autocomplete_stats():
+  return jsonify(names.stats())
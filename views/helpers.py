@@ -0,0 +1,168 @@
+from datetime import datetime, timezone
+from functools import wraps
+from flask import Response, abort, current_app, g, get_flashed_messages, make_response, request, session, \
+  stream_with_context, url_for
+from werkzeug.http import is_resource_modified
+from sqlalchemy import func, tuple_
+from extensions import db
+from models import Venue, Artist, Show, ShowArchive, ShowArchiveRun, request_now
+from api import version_etag
+
+def page_key(key):
+  # page data behind conditional_page is cached per Last-Modified: a change
+  # anywhere on the page moves it to a new key, so no worker can send data
+  # cached before the change under the newer Last-Modified
+  modified = g.get('last_modified')
+  return key if modified is None else '{}@{}'.format(key, modified.isoformat())
+
+def stream_query(query):
+  # a server-side cursor on Postgres: rows are fetched in batches as the
+  # template consumes them instead of all at once
+  return query.execution_options(stream_results=True).yield_per(current_app.config['STREAM_BATCH_SIZE'])
+
+def stream_template(template_name, **context):
+  # send the layout header straight away and the rest as it renders;
+  # stream_with_context keeps the request and its DB session open meanwhile
+  app = current_app._get_current_object()
+  # the session cookie is saved before the body streams, so pop pending
+  # flashes now; the template reads them back from the request context
+  get_flashed_messages(with_categories=True)
+  app.update_template_context(context)
+  stream = app.jinja_env.get_template(template_name).stream(context)
+  stream.enable_buffering(app.config['STREAM_BUFFER_SIZE'])
+  return Response(stream_with_context(stream))
+
+def table_versions(*models):
+  # max(updated_at) and max(id) are index lookups, and between them they
+  # change whenever a table does. Rows are never deleted, except the shows
+  # partition_shows moves out of Show, and every such move adds a
+  # ShowArchiveRun row, so that table is read along with Show.
+  if Show in models:
+    models += (ShowArchiveRun,)
+  columns = []
+  for model in models:
+    columns.append(db.session.query(func.max(model.updated_at)).as_scalar())
+    columns.append(db.session.query(func.max(model.id)).as_scalar())
+  return tuple(db.session.query(*columns).one())
+
+def entity_version(model, show_fk):
+  # the entity's own row: creating a show bumps its venue and artist
+  # (count_new_show), editing one side bumps the other (touch_show_partners).
+  # The latest start time already passed, one lookup at the end of the
+  # (venue_id|artist_id, start_time) index, moves the version as shows start,
+  # as that moves them from upcoming to past.
+  def version(entity_id):
+    latest_started = db.session.query(func.max(Show.start_time)) \
+      .filter(show_fk == model.id, Show.start_time < request_now()).as_scalar()
+    row = db.session.query(model.version, model.updated_at, latest_started) \
+      .filter(model.id == entity_id).first()
+    if row is None:
+      abort(404)
+    return tuple(row)
+  return version
+
+venue_version = entity_version(Venue, Show.venue_id)
+artist_version = entity_version(Artist, Show.artist_id)
+
+def newest(*timestamps):
+  # updated_at is naive UTC; Last-Modified wants naive UTC too
+  timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+  return max(timestamps) if timestamps else None
+
+def local_to_utc(value):
+  # show start times are naive local times, like request_now()
+  return None if value is None else value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def tables_last_modified(*models):
+  return lambda *args, **kwargs: newest(*table_versions(*models)[::2])
+
+def entity_last_modified(version):
+  def last_modified(entity_id):
+    _, updated, latest_started = version(entity_id)
+    return newest(updated, local_to_utc(latest_started))
+  return last_modified
+
+venue_last_modified = entity_last_modified(venue_version)
+artist_last_modified = entity_last_modified(artist_version)
+
+def conditional_page(last_modified):
+  # Last-Modified from the newest row the page shows, so browsers and the
+  # CDN can revalidate; a copy at least that new gets 304 without rendering
+  def decorator(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+      modified = g.last_modified = last_modified(*args, **kwargs)
+      # HTTP dates drop the microseconds, so a second write within the same
+      # second leaves Last-Modified unchanged; the ETag keeps full precision
+      # and If-None-Match takes precedence over If-Modified-Since
+      etag = None if modified is None else version_etag([modified])
+      if session.get('_flashes'):
+        # a pending flash message makes this rendering one-off
+        response = make_response(view(*args, **kwargs))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+      if modified is not None and not is_resource_modified(request.environ, etag=etag, last_modified=modified):
+        response = Response(status=304)
+      else:
+        response = make_response(view(*args, **kwargs))
+      if modified is not None:
+        response.last_modified = modified
+        response.set_etag(etag)
+      response.headers['Cache-Control'] = 'no-cache'
+      return response
+    return wrapper
+  return decorator
+
+def parse_date_arg(name):
+  # optional YYYY-MM-DD query argument; malformed values are a client error
+  value = request.args.get(name)
+  if not value:
+    return None
+  try:
+    return datetime.strptime(value, '%Y-%m-%d')
+  except ValueError:
+    abort(400)
+
+def parse_timestamp_arg(name):
+  # optional ISO 8601 date or datetime query argument
+  value = request.args.get(name)
+  if not value:
+    return None
+  try:
+    return datetime.fromisoformat(value)
+  except ValueError:
+    abort(400)
+
+def encode_cursor(start_time, show_id):
+  return '{}_{}'.format(start_time.isoformat(), show_id)
+
+def decode_cursor(cursor):
+  start_time, show_id = cursor.rsplit('_', 1)
+  return datetime.fromisoformat(start_time), int(show_id)
+
+def past_shows_page(fk, entity_id, other, other_fk, cursor, endpoint, **args):
+  # keyset pagination on (start_time, id), as on /shows: archived months
+  # first, then the past shows still in the hot partitions. The archive only
+  # holds months older than those, so the second picks up where it runs out.
+  page_size = current_app.config['SHOWS_PER_PAGE']
+  after = None
+  if cursor:
+    try:
+      after = decode_cursor(cursor)
+    except ValueError:
+      abort(400)
+  rows = []
+  for model in (ShowArchive, Show):
+    query = db.session.query(model.id, model.start_time, other.id, other.name, other.image_link) \
+      .join(other, other.id == getattr(model, other_fk)) \
+      .filter(getattr(model, fk) == entity_id, model.start_time < request_now())
+    if after is not None:
+      query = query.filter(tuple_(model.start_time, model.id) > tuple_(*after))
+    rows += query.order_by(model.start_time, model.id).limit(page_size + 1 - len(rows)).all()
+    if len(rows) > page_size:
+      break
+  next_url = None
+  if len(rows) > page_size:
+    last = rows[page_size - 1]
+    next_url = url_for(endpoint, cursor=encode_cursor(last[1], last[0]), **args)
+  return rows[:page_size], next_url
@@ -0,0 +1,84 @@
+from flask import Blueprint, render_template, request, Response, abort, jsonify, stream_with_context
+from extensions import db, page_cache, fragment_cache
+from models import Venue, Artist, Show, ShowArchive
+from database import use_replica
+from export import stream_rows, FORMATS as EXPORT_FORMATS
+from api import API_PREFIX, api_error
+from views.helpers import parse_timestamp_arg
+
+bp = Blueprint('main', __name__)
+
+@bp.route('/')
+def index():
+  return render_template('pages/home.html')
+
+#  Export
+#  ----------------------------------------------------------------
+
+EXPORT_COLUMNS = {
+  'venues': (Venue.id, Venue.name, Venue.city, Venue.state, Venue.address, Venue.phone, Venue.website,
+    Venue.facebook_link, Venue.image_link, Venue.seeking_talent, Venue.talent_description,
+    Venue.upcoming_shows_count, Venue.past_shows_count, Venue.updated_at),
+  'artists': (Artist.id, Artist.name, Artist.city, Artist.state, Artist.phone, Artist.genres, Artist.website,
+    Artist.facebook_link, Artist.image_link, Artist.seeking_venue, Artist.venue_description,
+    Artist.upcoming_shows_count, Artist.past_shows_count, Artist.updated_at),
+}
+EXPORT_MODELS = {'venues': Venue, 'artists': Artist}
+
+def show_export_query(model):
+  # Show and ShowArchive have the same columns; the export reads both
+  query = db.session.query(model.id, model.start_time, model.duration, model.venue_id,
+    Venue.name.label('venue_name'), model.artist_id, Artist.name.label('artist_name'), model.updated_at) \
+    .join(Venue, Venue.id == model.venue_id).join(Artist, Artist.id == model.artist_id)
+  since = parse_timestamp_arg('since')
+  if since is not None:
+    query = query.filter(model.start_time >= since)
+  return filter_updated_after(query, model)
+
+def filter_updated_after(query, model):
+  updated_after = parse_timestamp_arg('updated_after')
+  if updated_after is not None:
+    query = query.filter(model.updated_at > updated_after)
+  return query
+
+@bp.route('/export/<any(venues, artists, shows):entity>')
+@use_replica
+def export(entity):
+  format = request.args.get('format', 'ndjson')
+  if format not in EXPORT_FORMATS:
+    abort(400)
+  if entity == 'shows':
+    # every show, including the months partition_shows moved to ShowArchive
+    query = show_export_query(ShowArchive).union_all(show_export_query(Show)).order_by(ShowArchive.id)
+  else:
+    if 'since' in request.args:
+      abort(400)
+    model = EXPORT_MODELS[entity]
+    query = filter_updated_after(db.session.query(*EXPORT_COLUMNS[entity]), model).order_by(model.id)
+
+  columns = [column['name'] for column in query.column_descriptions]
+  return Response(stream_with_context(stream_rows(query, columns, format)),
+    mimetype=EXPORT_FORMATS[format],
+    headers={'Content-Disposition': 'attachment; filename={}.{}'.format(entity, format)})
+
+@bp.route('/cache/stats')
+def cache_stats():
+  return jsonify(dict(page_cache.stats(), fragments=fragment_cache.stats()))
+
+@bp.app_errorhandler(400)
+def bad_request_error(error):
+    if request.path.startswith(API_PREFIX):
+        return api_error(400, 'bad request')
+    return error
+
+@bp.app_errorhandler(404)
+def not_found_error(error):
+    if request.path.startswith(API_PREFIX):
+        return api_error(404, 'not found')
+    return render_template('errors/404.html'), 404
+
+@bp.app_errorhandler(500)
+def server_error(error):
+    if request.path.startswith(API_PREFIX):
+        return api_error(500, 'server error')
+    return render_template('errors/500.html'), 500
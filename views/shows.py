@@ -0,0 +1,116 @@
+from datetime import timedelta
+from urllib.parse import urlencode
+from flask import Blueprint, render_template, request, flash, url_for, abort, current_app
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from extensions import db, page_cache
+from models import Venue, Artist, Show, count_new_show, find_conflicts
+from database import use_replica
+from forms import ShowForm
+from views.helpers import conditional_page, page_key, stream_template, tables_last_modified, parse_date_arg, \
+  encode_cursor, decode_cursor
+
+bp = Blueprint('shows', __name__)
+
+#  Shows
+#  ----------------------------------------------------------------
+@bp.route('/shows')
+@use_replica
+@conditional_page(tables_last_modified(Show, Venue, Artist))
+def shows():
+  key = page_key('shows:{}'.format(urlencode(sorted(request.args.items()))))
+  data, next_url = page_cache.get_or_set(key, load_shows_page)
+  return stream_template('pages/shows.html', shows=data, next_url=next_url)
+
+def load_shows_page(endpoint='shows.shows'):
+  # keyset pagination on (start_time, id): each page is an index range scan
+  # starting right after the last row of the previous page
+  page_size = current_app.config['SHOWS_PER_PAGE']
+  query = db.session.query(Show.id, Show.start_time, Venue.id, Venue.name,
+    Artist.id, Artist.name, Artist.image_link, Show.updated_at, Venue.updated_at, Artist.updated_at) \
+    .join(Venue, Venue.id == Show.venue_id) \
+    .join(Artist, Artist.id == Show.artist_id)
+
+  date_from = parse_date_arg('from')
+  date_to = parse_date_arg('to')
+  if date_from is not None:
+    query = query.filter(Show.start_time >= date_from)
+  if date_to is not None:
+    query = query.filter(Show.start_time < date_to + timedelta(days=1))
+  cursor = request.args.get('cursor')
+  if cursor:
+    try:
+      after_time, after_id = decode_cursor(cursor)
+    except ValueError:
+      abort(400)
+    query = query.filter(tuple_(Show.start_time, Show.id) > tuple_(after_time, after_id))
+
+  rows = query.order_by(Show.start_time, Show.id).limit(page_size + 1).all()
+  data = []
+  for show_id, start_time, venue_id, venue_name, artist_id, artist_name, artist_image_link, \
+      show_updated_at, venue_updated_at, artist_updated_at in rows[:page_size]:
+    data.append({
+        "id": show_id,
+        # the tile shows artist and venue fields too, so any of the three
+        # rows changing must change its fragment cache key
+        "version": max(show_updated_at, venue_updated_at, artist_updated_at),
+        "venue_id": venue_id,
+        "venue_name": venue_name,
+        "artist_id": artist_id,
+        "artist_name": artist_name,
+        "artist_image_link": artist_image_link,
+        "start_time": start_time
+    })
+
+  next_url = None
+  if len(rows) > page_size:
+    last = rows[page_size - 1]
+    args = request.args.to_dict()
+    args['cursor'] = encode_cursor(last[1], last[0])
+    next_url = url_for(endpoint, **args)
+  return data, next_url
+
+@bp.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  form = ShowForm(request.form)
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # only the submission parses free-form dates; read-only workers never import it
+  import dateutil.parser
+  try:
+    artist_id = int(request.form['artist_id'])
+    venue_id = int(request.form['venue_id'])
+    start_time = dateutil.parser.parse(request.form['start_time'])
+    duration = int(request.form.get('duration') or current_app.config['SHOW_DEFAULT_DURATION'])
+    if not 0 < duration <= current_app.config['SHOW_MAX_DURATION']:
+      raise ValueError('duration out of range: {}'.format(duration))
+    if find_conflicts(venue_id, artist_id, start_time, duration):
+      flash('Show could not be listed: the artist or venue is already booked at that time.')
+    else:
+      show = Show(artist_id = artist_id,venue_id=venue_id,
+      start_time = start_time, duration = duration)
+      db.session.add(show)
+      count_new_show(show)
+      db.session.commit()
+      flash('Show was successfully listed!')
+
+  except IntegrityError as e:
+    # a concurrent booking got in first and tripped the exclusion constraint
+    print(e)
+    db.session.rollback()
+    if 'no_overlap' in str(e):
+      flash('Show could not be listed: the artist or venue is already booked at that time.')
+    else:
+      flash('An error occurred. Show could not be listed.')
+
+  except Exception as e:
+    print(e)
+    db.session.rollback()
+    flash('An error occurred. Show could not be listed.')
+
+  finally:
+    db.session.close()
+    return render_template('pages/home.html')
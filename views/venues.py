@@ -0,0 +1,199 @@
+import json
+from flask import Blueprint, render_template, request, flash, redirect, url_for, abort, current_app
+from sqlalchemy import and_, func
+from extensions import db, page_cache
+from models import Venue, Artist, Show, VenueArea, request_now, mark_area_stale, stale_venue_areas, \
+  refresh_venue_area, touch_show_partners
+from database import use_replica, use_primary
+from forms import VenueForm
+from search import get_search_backend
+from geo import nearby
+from views.helpers import conditional_page, page_key, stream_query, stream_template, venue_last_modified, \
+  past_shows_page
+from views import autocomplete
+
+bp = Blueprint('venues', __name__)
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@use_replica
+@conditional_page(lambda: venue_areas_last_modified())
+def venues():
+  return stream_template('pages/venues.html', areas=venue_areas())
+
+def venue_areas_last_modified():
+  # the summary may lag the writes by up to VENUE_AREAS_MAX_STALENESS;
+  # areas stale for longer are rebuilt on the primary before serving
+  stale = stale_venue_areas(current_app.config['VENUE_AREAS_MAX_STALENESS'])
+  if stale:
+    with use_primary():
+      for area_id in stale:
+        refresh_venue_area(area_id)
+  return db.session.query(func.max(VenueArea.refreshed_at)).scalar()
+
+def venue_areas():
+  # one row per area in (city, state) order, off the unique index
+  rows = stream_query(db.session.query(VenueArea.id, VenueArea.city, VenueArea.state, VenueArea.venues,
+    VenueArea.refreshed_at).filter(VenueArea.venue_count > 0).order_by(VenueArea.city, VenueArea.state))
+  for area_id, city, state, venues, refreshed_at in rows:
+    yield {"id": area_id, "city": city, "state": state, "refreshed_at": refreshed_at, "venues": json.loads(venues)}
+
+@bp.route('/venues/search', methods=['POST'])
+def search_venues():
+  search_term = request.form.get('search_term', '')
+  data = get_search_backend(db.session).search(Venue, search_term)
+  response = {"count": len(data), "data": data}
+  return render_template('pages/search_venues.html', results=response, search_term=search_term)
+
+@bp.route('/venues/nearby')
+def nearby_venues():
+  try:
+    lat = float(request.args['lat'])
+    lon = float(request.args['lon'])
+    radius = float(request.args.get('radius', 20))
+  except (KeyError, ValueError):
+    abort(400)
+  if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 0 < radius <= current_app.config['NEARBY_MAX_RADIUS']):
+    abort(400)
+  data = nearby(db.session, Venue, lat, lon, radius, limit=current_app.config['NEARBY_RESULTS_LIMIT'])
+  return render_template('pages/nearby_venues.html', venues=data, lat=lat, lon=lon, radius=radius)
+
+@bp.route('/venues/<int:venue_id>')
+@use_replica
+@conditional_page(lambda venue_id: venue_last_modified(venue_id))
+def show_venue(venue_id):
+  venue = page_cache.get_or_set(page_key('venue:{}'.format(venue_id)), lambda: load_venue(venue_id))
+  return render_template('pages/show_venue.html', venue=venue)
+
+def load_venue(venue_id):
+  # the venue and its upcoming shows with their artists in one statement;
+  # the start_time bound keeps the scan to the current and future months.
+  # Past shows are loaded separately, only when the page asks for them.
+  rows = db.session.query(Venue, Show.start_time, Artist.id, Artist.name, Artist.image_link) \
+    .outerjoin(Show, and_(Show.venue_id == Venue.id, Show.start_time >= request_now())) \
+    .outerjoin(Artist, Artist.id == Show.artist_id) \
+    .filter(Venue.id == venue_id) \
+    .order_by(Show.start_time, Show.id).all()
+  if not rows:
+    abort(404)
+
+  venue = rows[0][0]
+  venue_obj = {'id':venue.id,'name' : venue.name,'city': venue.city,'state':venue.state,'website':venue.website,
+  'phone': venue.phone,'facebook_link':venue.facebook_link,'image_link':venue.image_link,
+  'seeking_talent': venue.seeking_talent,'address':venue.address,'seeking_description':venue.talent_description}
+
+  upcoming_shows = []
+  for _, start_time, artist_id, artist_name, artist_image_link in rows:
+    if start_time is None:
+      continue
+    upcoming_shows.append({'artist_id':artist_id,'artist_name':artist_name,'artist_image_link':artist_image_link,
+    'start_time': start_time})
+
+  venue_obj['upcoming_shows'] = upcoming_shows
+  venue_obj['upcoming_shows_count'] = len(upcoming_shows)
+  # the counters hold every show, archived ones included; whatever is not
+  # upcoming any more is past, even before reconcile_counts rolls it over
+  venue_obj['past_shows_count'] = max(venue.upcoming_shows_count + venue.past_shows_count - len(upcoming_shows), 0)
+  return venue_obj
+
+@bp.route('/venues/<int:venue_id>/past_shows')
+@use_replica
+@conditional_page(lambda venue_id: venue_last_modified(venue_id))
+def venue_past_shows(venue_id):
+  cursor = request.args.get('cursor')
+  shows, next_url = page_cache.get_or_set(page_key('venue-past:{}:{}'.format(venue_id, cursor or '')),
+    lambda: load_venue_past_shows(venue_id, cursor))
+  return render_template('pages/venue_past_shows.html', shows=shows, next_url=next_url)
+
+def load_venue_past_shows(venue_id, cursor=None, endpoint='venues.venue_past_shows'):
+  # a page of past shows, oldest first, and the URL of the next one
+  rows, next_url = past_shows_page('venue_id', venue_id, Artist, 'artist_id', cursor, endpoint, venue_id=venue_id)
+  shows = [{'artist_id':artist_id,'artist_name':artist_name,'artist_image_link':artist_image_link,
+    'start_time': start_time} for _, start_time, artist_id, artist_name, artist_image_link in rows]
+  return shows, next_url
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  form = VenueForm(request.form)
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  try:
+    seeking_talent = False
+    talent_description = ''
+    if 'seeking_talent' in request.form:
+      seeking_talent = True
+    if 'seeking_description' in request.form:
+      talent_description = request.form['seeking_description']
+    venue = Venue(name=request.form['name'],city=request.form['city'],state=request.form['state'],
+    address=request.form.get('address'),phone=request.form['phone'],website=request.form['website'],image_link=request.form['image_link']
+    ,facebook_link=request.form['facebook_link'],seeking_talent=seeking_talent,
+    talent_description=talent_description)
+    db.session.add(venue)
+    db.session.flush()
+    venue_id = venue.id
+    mark_area_stale(venue.city, venue.state)
+    db.session.commit()
+    autocomplete.names.update('venue', venue_id, request.form['name'], 0)
+    flash('Venue ' + request.form['name'] + ' was successfully listed!')
+
+  except Exception as e:
+    print(e)
+    db.session.rollback()
+    flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+
+  finally:
+    db.session.close()
+    return render_template('pages/home.html')
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  venue = Venue.query.filter_by(id = venue_id).one()
+  form = VenueForm(obj=venue)
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  try:
+    if request.form['seeking_talent'] == 'y':
+      seeking_talent = True
+      talent_description = request.form['seeking_description']
+    else:
+      seeking_talent = False
+      talent_description = None
+
+    new_venue = dict(name=request.form['name'],city = request.form['city'],
+    state= request.form['state'],address = request.form['address'],
+    facebook_link = request.form['facebook_link'],image_link=request.form['image_link'],
+    website = request.form['website'], seeking_talent = seeking_talent,
+    talent_description = talent_description)
+    # the venue leaves its old area's listing and joins the new one's
+    old_city, old_state, old_address = db.session.query(Venue.city, Venue.state, Venue.address) \
+      .filter(Venue.id==venue_id).one()
+    if (old_address, old_city, old_state) != (new_venue['address'], new_venue['city'], new_venue['state']):
+      # the venue moved; the next geocode run places it again
+      new_venue.update(latitude=None, longitude=None, geo_cell=None)
+    db.session.query(Venue).filter(Venue.id==venue_id).update(new_venue)
+    touch_show_partners(Venue, venue_id)
+    mark_area_stale(old_city, old_state)
+    mark_area_stale(new_venue['city'], new_venue['state'])
+    db.session.commit()
+    autocomplete.names.update('venue', venue_id, new_venue['name'])
+    flash('Venue was edited to be ' + request.form['name'] + ' succesfully.')
+
+  except Exception as e:
+    print(e)
+    flash('Venue was not edited succesfully.')
+    db.session.rollback()
+  finally:
+    db.session.close()
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))
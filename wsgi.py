@@ -0,0 +1,4 @@
+from app import create_app
+
+# the object gunicorn serves: gunicorn --config gunicorn.conf.py wsgi:app
+app = create_app()